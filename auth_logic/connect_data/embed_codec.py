@@ -0,0 +1,55 @@
+# embed_codec.py
+
+import numpy as np
+from bson.binary import Binary
+
+from auth_logic.usr_constants.embed_cfg import EMBED_STORE_DTYPE
+
+EMBED_FORMAT_VERSION = 1
+
+# Explicit little-endian layouts so stored bytes do not depend on the host
+_LAYOUTS = {"float32": "<f4", "float16": "<f2", "int8": "i1"}
+
+
+def encode_embedding(vector, dtype: str = EMBED_STORE_DTYPE) -> dict:
+    """Pack a vector (or matrix of row vectors) into a versioned BSON Binary document.
+
+    ``int8`` quantises each row symmetrically with its own scale, stored
+    alongside the bytes.
+    """
+    if dtype not in _LAYOUTS:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    arr = np.asarray(vector, dtype=np.float32)
+    doc = {"v": EMBED_FORMAT_VERSION, "dtype": dtype, "shape": list(arr.shape)}
+    if dtype == "int8":
+        scale = np.abs(arr).max(axis=-1, keepdims=True) / 127
+        scale[scale == 0] = 1.0
+        arr = np.clip(np.rint(arr / scale), -127, 127)
+        doc["scale"] = scale.reshape(-1).tolist()
+    doc["data"] = Binary(arr.astype(_LAYOUTS[dtype]).tobytes())
+    return doc
+
+
+def decode_embedding(value) -> np.ndarray:
+    """Return a float32 array from a stored embedding.
+
+    float32 payloads are read zero-copy with ``np.frombuffer`` (the result is
+    read-only). Legacy documents that hold a plain list of doubles are still
+    accepted.
+    """
+    if not isinstance(value, dict):
+        return np.asarray(value, dtype=np.float32)
+    dtype = value["dtype"]
+    arr = np.frombuffer(value["data"], dtype=_LAYOUTS[dtype])
+    if dtype != "float32":
+        arr = arr.astype(np.float32)
+    arr = arr.reshape(value["shape"])
+    if dtype == "int8":
+        scale = np.asarray(value["scale"], dtype=np.float32)
+        arr *= scale.reshape(arr.shape[:-1] + (1,)) if arr.ndim > 1 else scale[0]
+    return arr
+
+
+def is_legacy(value) -> bool:
+    """True for embeddings still stored as a list of BSON doubles."""
+    return isinstance(value, list)
@@ -0,0 +1,64 @@
+# migrate_embeds.py
+"""Convert legacy list-of-doubles embeddings to the binary storage format.
+
+Usage:
+    python -m auth_logic.connect_data.migrate_embeds --dtype float32 --batch-size 500 [--dry-run]
+"""
+
+import argparse
+import logging
+
+from pymongo import UpdateOne
+
+from auth_logic.usr_constants.embed_cfg import EMBED_STORE_DTYPE
+from auth_logic.connect_data.embed_codec import encode_embedding
+from auth_logic.connect_data.usr_emb_ops import EmbDataHandler
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger("EmbedMigration")
+
+
+def migrate_embeddings(collection, dtype: str = EMBED_STORE_DTYPE, batch_size: int = 500, dry_run: bool = False) -> dict:
+    """Rewrite every list-typed ``embed_data`` in ``_id`` order, one bulk write per batch."""
+    legacy = {"embed_data": {"$type": "array"}}
+    counts = {"scanned": 0, "converted": 0, "bytes_before": 0, "bytes_after": 0}
+    last_id = None
+    while True:
+        query = dict(legacy)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = list(collection.find(query, {"embed_data": 1}).sort("_id", 1).limit(batch_size))
+        if not batch:
+            break
+        updates = []
+        for doc in batch:
+            encoded = encode_embedding(doc["embed_data"], dtype)
+            counts["bytes_before"] += len(doc["embed_data"]) * 8
+            counts["bytes_after"] += len(encoded["data"])
+            updates.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"embed_data": encoded}}))
+        if not dry_run:
+            result = collection.bulk_write(updates, ordered=False)
+            counts["converted"] += result.modified_count
+        counts["scanned"] += len(batch)
+        last_id = batch[-1]["_id"]
+        log.info(f"Processed {counts['scanned']} legacy embeddings.")
+    return counts
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Convert stored embeddings to the binary format.")
+    parser.add_argument("--dtype", default=EMBED_STORE_DTYPE, choices=["float32", "float16", "int8"])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Count and size documents without writing.")
+    args = parser.parse_args(argv)
+
+    counts = migrate_embeddings(EmbDataHandler().collection, args.dtype, args.batch_size, args.dry_run)
+    log.info(
+        f"Scanned {counts['scanned']}, converted {counts['converted']}; vector payload "
+        f"{counts['bytes_before']} -> {counts['bytes_after']} bytes (excluding BSON key overhead)."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# record_cache.py
+
+import sys
+import time
+import threading
+from collections import OrderedDict
+from typing import Hashable, Iterable, Optional
+
+import numpy as np
+
+from auth_logic.usr_constants.serve_cfg import (
+    RECORD_CACHE_MAX_ENTRIES,
+    RECORD_CACHE_MAX_MB,
+    RECORD_CACHE_TTL_S,
+)
+
+MISSING = object()
+
+
+class CacheFill:
+    """A read that will fill one cache key; invalidating the key meanwhile makes it stale."""
+
+    __slots__ = ("key", "stale")
+
+    def __init__(self, key: Hashable) -> None:
+        self.key = key
+        self.stale = False
+
+
+def estimate_size(value) -> int:
+    """Rough byte size of a cached record (dicts, lists, arrays, scalars)."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes + 112
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class RecordCache:
+    """Thread-safe LRU cache with a TTL and an approximate byte budget.
+
+    Entries can carry tags (e.g. a user's UUID) so every key derived from the
+    same record is dropped together when that record is written. A read that
+    misses can take a ``begin_fill`` token and pass it to ``put``: if the key
+    was invalidated while the read ran, the possibly stale value is not stored.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = RECORD_CACHE_MAX_ENTRIES,
+        max_bytes: int = int(RECORD_CACHE_MAX_MB * 1024 * 1024),
+        ttl_s: float = RECORD_CACHE_TTL_S,
+    ) -> None:
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._tags = {}
+        self._fills = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable):
+        """Return the cached value or ``MISSING``; expired entries count as misses."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            value, expires, _, _ = entry
+            if expires < time.monotonic():
+                self._drop(key)
+                self.misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def begin_fill(self, key: Hashable) -> CacheFill:
+        """Start a read that will fill ``key``; pass the token to ``put`` or ``end_fill``."""
+        fill = CacheFill(key)
+        with self._lock:
+            self._fills.setdefault(key, set()).add(fill)
+        return fill
+
+    def end_fill(self, fill: CacheFill) -> None:
+        """Finish a fill without storing anything."""
+        with self._lock:
+            self._release_fill(fill)
+
+    def put(self, key: Hashable, value, tags: Iterable[Hashable] = (), fill: Optional[CacheFill] = None) -> None:
+        """Store a value, evicting least recently used entries over budget.
+
+        With a ``fill`` token the value is dropped if the key was invalidated
+        after ``begin_fill``.
+        """
+        size = estimate_size(value)
+        tags = tuple(tags)
+        with self._lock:
+            if fill is not None:
+                self._release_fill(fill)
+                if fill.stale:
+                    return
+            if size > self.max_bytes:
+                return
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (value, time.monotonic() + self.ttl_s, size, tags)
+            self._bytes += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            for fill in self._fills.pop(key, ()):
+                fill.stale = True
+            if key in self._data:
+                self._drop(key)
+
+    def invalidate_tag(self, tag: Hashable) -> None:
+        """Drop every entry stored with the given tag."""
+        with self._lock:
+            for key in list(self._tags.get(tag, ())):
+                self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            for fills in self._fills.values():
+                for fill in fills:
+                    fill.stale = True
+            self._fills.clear()
+            self._data.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def _release_fill(self, fill: CacheFill) -> None:
+        fills = self._fills.get(fill.key)
+        if fills is not None:
+            fills.discard(fill)
+            if not fills:
+                del self._fills[fill.key]
+
+    def _drop(self, key: Hashable) -> None:
+        _, _, size, tags = self._data.pop(key)
+        self._bytes -= size
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current occupancy."""
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def query_key(query: dict) -> Optional[tuple]:
+    """Hashable cache key for a flat Mongo equality query, or None if not cacheable."""
+    try:
+        key = tuple(sorted(query.items()))
+        hash(key)
+        return key
+    except TypeError:
+        return None
+
+
+user_cache = RecordCache("users")
+embed_cache = RecordCache("embeddings")
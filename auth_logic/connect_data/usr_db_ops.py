@@ -3,6 +3,8 @@
 from usr_db_conf.mongo_setup import MongoDBConn
 from auth_logic.usr_constants.db_cfg import USR_COL_NEW 
 from auth_logic.usr_entities.usr_data_entity import UserData  
+from auth_logic.connect_data.record_cache import MISSING, query_key, user_cache
+from auth_logic.usr_log.metrics import stage
 
 import logging
 
@@ -17,17 +19,33 @@ class UserDatabaseOperations:
         self.client = MongoDBConn()
         self.collection_name = USR_COL_NEW
         self.collection = self.client.get_database()[self.collection_name]
-        db_logger.info(f"Connected to collection: {self.collection_name}")
+        # Handlers are built per request on a shared client, so keep this quiet
+        db_logger.debug(f"Connected to collection: {self.collection_name}")
 
     def insert_new_user(self, user: UserData) -> None:
         """Inserts a new user into the database."""
         db_logger.debug(f"Inserting user: {user.user_handle}")
         self.collection.insert_one(user.to_dict())
 
+    def add_user(self, record: dict) -> None:
+        """Inserts a prepared user record (hashed password included)."""
+        db_logger.debug(f"Inserting user record: {record.get('UUID')}")
+        self.collection.insert_one(record)
+
     def find_user_by_query(self, query: dict):
         """Fetch a single user based on a specified query."""
+        key = query_key(query)
+        if key is not None:
+            cached = user_cache.get(key)
+            if cached is not MISSING:
+                return dict(cached)
         db_logger.debug(f"Querying user with: {query}")
-        return self.collection.find_one(query)
+        with stage("mongo"):
+            user = self.collection.find_one(query)
+        if user is not None and key is not None:
+            user_cache.put(key, user, tags=(user.get("UUID"),))
+            user = dict(user)
+        return user
 
     def retrieve_all_users(self):
         """Retrieve all users from the collection."""
@@ -38,6 +56,7 @@ class UserDatabaseOperations:
         """Removes a user by their unique ID."""
         db_logger.debug(f"Deleting user with ID: {user_id}")
         result = self.collection.delete_one({"UUID": user_id})
+        user_cache.invalidate_tag(user_id)
         if result.deleted_count == 1:
             db_logger.info(f"User with ID: {user_id} successfully deleted.")
         else:
@@ -47,4 +66,5 @@ class UserDatabaseOperations:
         """Deletes all user records in the collection."""
         db_logger.warning("Deleting all users from the collection.")
         self.collection.delete_many({})
+        user_cache.clear()
         db_logger.info("All user records have been successfully deleted.")
@@ -1,45 +1,123 @@
 # usr_emb_ops.py
 
 import logging
+from typing import Optional
+
+import numpy as np
 from usr_db_conf.mongo_setup import MongoDBConn
-from usr_constants.db_cfg import EMBED_COLLECT
+from auth_logic.usr_constants.db_cfg import EMBED_COL_NEW
+from auth_logic.usr_constants.embed_cfg import EMB_MODEL_ID
+from auth_logic.usr_log.metrics import stage
+from auth_logic.inference.gallery_index import normalize_rows
+from auth_logic.connect_data.record_cache import MISSING, embed_cache
+from auth_logic.connect_data.embed_codec import decode_embedding, encode_embedding
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger("EmbedStoreOps")
 
+def read_only(array: np.ndarray) -> np.ndarray:
+    """Mark a cached array read-only so a caller cannot corrupt the shared copy."""
+    array.setflags(write=False)
+    return array
+
+
+def copy_record(record: dict) -> dict:
+    """Shallow copy of a cached embedding record, with its own ``templates`` dict."""
+    return {**record, "templates": dict(record["templates"])}
+
+
 class EmbDataHandler:
-    """Manages DB operations for user embeddings."""
+    """Manages DB operations for user embeddings.
+
+    The 1:N gallery is not touched here: writes can run in a worker process,
+    so the serving process updates its gallery once the job has returned.
+    """
 
     def __init__(self) -> None:
         # Initialize MongoDB connection
         self.client = MongoDBConn()
-        self.collection_name = EMBED_COLLECT
+        self.collection_name = EMBED_COL_NEW
         self.collection = self.client.get_database()[self.collection_name]
-        log.info("Embedding Data Handler initialized.")
+        log.debug("Embedding Data Handler initialized.")
 
     def add_embed(self, user_id: str, embed_data) -> None:
         """Insert embedding into the collection."""
         try:
-            self.collection.insert_one({"user_id": user_id, "embed_data": embed_data})
+            self.collection.insert_one({"user_id": user_id, "embed_data": encode_embedding(embed_data)})
+            embed_cache.invalidate(user_id)
             log.info(f"Embedding added for user {user_id}.")
         except Exception as e:
             log.error(f"Failed to add embedding: {e}")
             raise
 
+    def save_embed(self, user_id: str, embed_data, templates: Optional[dict] = None) -> None:
+        """Insert or replace a user's embedding.
+
+        ``templates`` maps model ids to a template vector or matrix; each is
+        stored under ``templates.<model_id>`` next to the averaged ``embed_data``.
+        The whole ``templates`` field is replaced, so a model left out of this
+        enrollment cannot keep scoring logins against the previous face.
+        """
+        try:
+            update = {
+                "embed_data": encode_embedding(embed_data),
+                "templates": {model_id: encode_embedding(template) for model_id, template in (templates or {}).items()},
+            }
+            self.collection.update_one({"user_id": user_id}, {"$set": update}, upsert=True)
+            embed_cache.invalidate(user_id)
+            log.info(f"Embedding saved for user {user_id}.")
+        except Exception as e:
+            log.error(f"Failed to save embedding: {e}")
+            raise
+
     def get_embed(self, user_id: str) -> dict:
-        """Fetch a user's embedding by ID."""
+        """Fetch a user's embedding by ID, with ``embed_data`` decoded to float32.
+
+        ``templates`` maps every model id with a stored template (the primary
+        model included) to a ``(K, D)`` matrix of unit-norm templates,
+        normalised here once so scoring never recomputes norms. The arrays are
+        read-only and shared with the cache; callers get their own dicts.
+        """
         try:
+            cached = embed_cache.get(user_id)
+            if cached is not MISSING:
+                return copy_record(cached)
             log.info(f"Fetching embedding for user {user_id}.")
-            return self.collection.find_one({"user_id": user_id})
+            # A save or delete during the read voids the fill, so a stale record is not cached
+            fill = embed_cache.begin_fill(user_id)
+            try:
+                with stage("mongo"):
+                    record = self.collection.find_one({"user_id": user_id})
+                if record is None:
+                    return None
+                record["embed_data"] = decode_embedding(record["embed_data"])
+                templates = record.get("templates", {})
+                # Records enrolled before template matrices only have the averaged embed_data
+                templates.setdefault(EMB_MODEL_ID, record["embed_data"])
+                record["templates"] = {
+                    k: read_only(normalize_rows(np.atleast_2d(decode_embedding(v)))) for k, v in templates.items()
+                }
+                read_only(record["embed_data"])
+                embed_cache.put(user_id, record, fill=fill)
+                return copy_record(record)
+            finally:
+                embed_cache.end_fill(fill)
         except Exception as e:
             log.error(f"Failed to fetch embedding: {e}")
             return None
 
+    def iter_embeds(self):
+        """Yield ``(user_id, float32 embedding)`` for every stored embedding."""
+        cursor = self.collection.find({}, {"_id": 0, "user_id": 1, "embed_data": 1}).batch_size(10000)
+        for doc in cursor:
+            yield doc["user_id"], decode_embedding(doc["embed_data"])
+
     def delete_embed(self, user_id: str) -> None:
         """Remove a user's embedding by ID."""
         try:
             self.collection.delete_one({"user_id": user_id})
+            embed_cache.invalidate(user_id)
             log.info(f"Embedding deleted for user {user_id}.")
         except Exception as e:
             log.error(f"Failed to delete embedding")
@@ -0,0 +1,137 @@
+# batch_scheduler.py
+
+import sys
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from auth_logic.usr_constants.embed_cfg import EMBEDDING_SIZE
+from auth_logic.usr_constants.serve_cfg import BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS
+from auth_logic.usr_exceptions.error_handler import CustomError
+from auth_logic.inference.embedding_engine import get_embedding_engine
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger("InferenceScheduler")
+
+
+class _PendingFace:
+    """One preprocessed face waiting for a batch slot."""
+
+    __slots__ = ("tensor", "future")
+
+    def __init__(self, tensor: np.ndarray) -> None:
+        self.tensor = tensor
+        self.future = Future()
+
+
+class InferenceScheduler:
+    """Gathers face crops from concurrent callers into shared forward passes.
+
+    Callers preprocess on their own thread and enqueue one item per face. A
+    single worker thread flushes a batch when it holds ``max_batch`` faces or
+    when the oldest face has waited ``max_wait_ms``, whichever comes first,
+    and resolves each caller's future with its own embedding row.
+    """
+
+    def __init__(self, engine=None, max_batch: int = BATCH_MAX_SIZE, max_wait_ms: float = BATCH_MAX_WAIT_MS) -> None:
+        self.engine = engine or get_embedding_engine()
+        self.max_batch = max(int(max_batch), 1)
+        self.max_wait = max_wait_ms / 1000
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._full_batches = 0
+
+    def start(self) -> None:
+        """Start the worker thread if it is not running yet."""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+                self._thread.start()
+
+    def submit(self, faces: Sequence[np.ndarray]) -> List[Future]:
+        """Queue face crops and return one future per crop."""
+        self.start()
+        pending = [_PendingFace(tensor) for tensor in self.engine.preprocess(faces)]
+        for item in pending:
+            self._queue.put(item)
+        return [item.future for item in pending]
+
+    def embed(self, faces: Sequence[np.ndarray]) -> np.ndarray:
+        """Embed face crops through the shared queue, blocking until done."""
+        try:
+            futures = self.submit(faces)
+            if not futures:
+                return np.empty((0, EMBEDDING_SIZE), dtype=np.float32)
+            return np.stack([future.result() for future in futures])
+        except Exception as e:
+            raise CustomError(e, sys) from e
+
+    def _collect(self) -> List[_PendingFace]:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                embeds = self.engine.forward(np.stack([item.tensor for item in batch]))
+                for item, row in zip(batch, embeds):
+                    item.future.set_result(row)
+            except Exception as e:
+                log.error(f"Batch of {len(batch)} faces failed: {e}")
+                for item in batch:
+                    item.future.set_exception(e)
+            self._batches += 1
+            self._items += len(batch)
+            self._full_batches += len(batch) == self.max_batch
+
+    def stats(self) -> dict:
+        """Queue depth and batch fill figures since start."""
+        batches = self._batches or 1
+        return {
+            "queue_depth": self._queue.qsize(),
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / batches, 2),
+            "avg_batch_fill": round(self._items / (batches * self.max_batch), 3),
+            "full_batches": self._full_batches,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> InferenceScheduler:
+    """Return the process-wide inference scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = InferenceScheduler()
+    return _scheduler
+
+
+def scheduler_stats() -> Optional[dict]:
+    """Stats of the process-wide scheduler, or None if it has not been started."""
+    return None if _scheduler is None else _scheduler.stats()
@@ -0,0 +1,88 @@
+# embed_memo.py
+
+import logging
+import threading
+from typing import Callable, Hashable, List, Optional, Sequence
+
+import cv2
+import numpy as np
+
+from auth_logic.usr_constants.serve_cfg import EMBED_MEMO_MAX_ENTRIES, EMBED_MEMO_TTL_S
+from auth_logic.connect_data.record_cache import MISSING, RecordCache
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger("EmbedMemo")
+
+# 16x16 difference hash: 256 bits, so unrelated crops practically never collide
+HASH_SIDE = 16
+
+
+def dhash(face: np.ndarray, side: int = HASH_SIDE) -> bytes:
+    """Difference hash of a BGR face crop: signs of horizontal gradients on a tiny gray copy."""
+    gray = cv2.cvtColor(face, cv2.COLOR_BGR2GRAY) if face.ndim == 3 else face
+    small = cv2.resize(gray, (side + 1, side), interpolation=cv2.INTER_AREA)
+    return np.packbits(small[:, 1:] > small[:, :-1]).tobytes()
+
+
+class EmbeddingMemo:
+    """Returns stored embeddings for face crops that were already embedded.
+
+    Duplicates inside one call are embedded once; across calls the
+    embeddings live in a small TTL-bounded RecordCache. Keys combine the
+    model id, the caller's scope (the claimed user, when known) and the
+    crop's perceptual hash, so a memo entry is only reused for the same
+    model and user.
+    """
+
+    def __init__(self, max_entries: int = EMBED_MEMO_MAX_ENTRIES, ttl_s: float = EMBED_MEMO_TTL_S) -> None:
+        self.cache = RecordCache("embed_memo", max_entries=max_entries, ttl_s=ttl_s)
+        self._lock = threading.Lock()
+        self.faces = 0
+        self.embedded = 0
+
+    def embed(
+        self,
+        faces: Sequence[np.ndarray],
+        embed_fn: Callable[[List[np.ndarray]], np.ndarray],
+        model_id: str,
+        scope: Optional[Hashable] = None,
+    ) -> np.ndarray:
+        """Embeddings for ``faces``, running ``embed_fn`` only on crops not seen before."""
+        if not len(faces):
+            return embed_fn([])
+        keys = [(model_id, scope, dhash(face)) for face in faces]
+        found = {}
+        missing = {}
+        for key, face in zip(keys, faces):
+            if key in found or key in missing:
+                continue
+            cached = self.cache.get(key)
+            if cached is MISSING:
+                missing[key] = face
+            else:
+                found[key] = cached
+
+        if missing:
+            for key, embed in zip(missing, embed_fn(list(missing.values()))):
+                embed = np.array(embed, dtype=np.float32)
+                self.cache.put(key, embed)
+                found[key] = embed
+
+        with self._lock:
+            self.faces += len(faces)
+            self.embedded += len(missing)
+        if len(missing) < len(faces):
+            log.info(f"Embedding memo reused {len(faces) - len(missing)} of {len(faces)} faces.")
+        return np.stack([found[key] for key in keys])
+
+    def stats(self) -> dict:
+        """Cache counters plus the share of faces that skipped the model."""
+        stats = self.cache.stats()
+        stats["faces"] = self.faces
+        stats["embedded"] = self.embedded
+        stats["saved_rate"] = round(1 - self.embedded / self.faces, 3) if self.faces else 0.0
+        return stats
+
+
+embed_memo = EmbeddingMemo()
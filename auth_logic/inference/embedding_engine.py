@@ -0,0 +1,166 @@
+# embedding_engine.py
+
+import sys
+import logging
+from typing import Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from auth_logic.usr_constants.embed_cfg import EMB_MODEL_ID, EMBED_ENGINE, EMBEDDING_SIZE
+from auth_logic.usr_exceptions.error_handler import CustomError
+from auth_logic.inference.model_registry import model_registry
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger("EmbeddingEngine")
+
+
+class FacenetEngine:
+    """Runs the registry's Facenet model on stacked face crops in one forward pass."""
+
+    # Key of this model's templates in embedding records
+    model_id = EMB_MODEL_ID
+    embedding_size = EMBEDDING_SIZE
+
+    def __init__(self, registry=model_registry) -> None:
+        self.registry = registry
+
+    @property
+    def model(self):
+        return self.registry.get("embedding_model")
+
+    def input_size(self) -> Tuple[int, int]:
+        """Return the (height, width) the model expects."""
+        shape = self.model.input_shape
+        return int(shape[1]), int(shape[2])
+
+    @staticmethod
+    def fit_into(face: np.ndarray, out: np.ndarray) -> None:
+        """Resize a crop into ``out`` keeping aspect ratio and zero padding.
+
+        Mirrors DeepFace's ``preprocess_face`` so batched embeddings stay
+        comparable with templates stored by the per-image path.
+        """
+        target_h, target_w = out.shape[:2]
+        factor = min(target_h / face.shape[0], target_w / face.shape[1])
+        new_w = max(int(face.shape[1] * factor), 1)
+        new_h = max(int(face.shape[0] * factor), 1)
+        resized = cv2.resize(face, (new_w, new_h))
+        top = (target_h - new_h) // 2
+        left = (target_w - new_w) // 2
+        out[top:top + new_h, left:left + new_w] = resized
+        out *= 1.0 / 255
+
+    def preprocess(self, faces: Sequence[np.ndarray]) -> np.ndarray:
+        """Stack BGR face crops into a normalised ``(N, H, W, 3)`` float32 batch.
+
+        Crops are fed in RGB order: templates enrolled before frames were
+        decoded with OpenCV came from PIL's RGB arrays, and stay valid.
+        """
+        height, width = self.input_size()
+        batch = np.zeros((len(faces), height, width, 3), dtype=np.float32)
+        for i, face in enumerate(faces):
+            self.fit_into(cv2.cvtColor(face, cv2.COLOR_BGR2RGB), batch[i])
+        return batch
+
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        """Run one forward pass over a preprocessed batch."""
+        if not len(batch):
+            return np.empty((0, self.embedding_size), dtype=np.float32)
+        return np.asarray(self.model.predict_on_batch(batch), dtype=np.float32)
+
+    def embed_batch(self, faces: Sequence[np.ndarray]) -> np.ndarray:
+        """Embed all face crops at once, returning an ``(N, D)`` float32 array."""
+        try:
+            embeds = self.forward(self.preprocess(faces))
+            log.info(f"Embedded {len(faces)} faces with {self.model_id} in a single batch.")
+            return embeds
+        except Exception as e:
+            raise CustomError(e, sys) from e
+
+
+class OnnxFacenetEngine(FacenetEngine):
+    """Facenet exported to ONNX and run with ONNX Runtime on CPU, without TensorFlow.
+
+    The export keeps the Keras NHWC layout, so preprocessing is shared with
+    the DeepFace engine and embeddings stay comparable with stored templates.
+    """
+
+    @property
+    def model(self):
+        return self.registry.get("onnx_embedding_model")
+
+    def input_size(self) -> Tuple[int, int]:
+        shape = self.model.get_inputs()[0].shape
+        return int(shape[1]), int(shape[2])
+
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        if not len(batch):
+            return np.empty((0, self.embedding_size), dtype=np.float32)
+        session = self.model
+        outputs = session.run(None, {session.get_inputs()[0].name: batch})
+        return np.asarray(outputs[0], dtype=np.float32)
+
+
+class MobileFaceNetEngine(OnnxFacenetEngine):
+    """MobileFaceNet (ONNX) used as the cheap first tier of the model cascade.
+
+    Takes 112x112 RGB crops scaled to [-1, 1]; the layout (NCHW or NHWC)
+    is read from the model's input shape.
+    """
+
+    model_id = "mobilefacenet"
+
+    @property
+    def model(self):
+        return self.registry.get("fast_embedding_model")
+
+    def channels_first(self) -> bool:
+        return self.model.get_inputs()[0].shape[1] == 3
+
+    def input_size(self) -> Tuple[int, int]:
+        shape = self.model.get_inputs()[0].shape
+        return (int(shape[2]), int(shape[3])) if self.channels_first() else (int(shape[1]), int(shape[2]))
+
+    def preprocess(self, faces: Sequence[np.ndarray]) -> np.ndarray:
+        height, width = self.input_size()
+        batch = np.empty((len(faces), height, width, 3), dtype=np.float32)
+        for i, face in enumerate(faces):
+            resized = cv2.resize(face, (width, height), interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(resized, cv2.COLOR_BGR2RGB, dst=resized)
+            batch[i] = resized
+        batch *= 1.0 / 127.5
+        batch -= 1.0
+        if self.channels_first():
+            batch = np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+        return batch
+
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        if not len(batch):
+            return np.empty((0, 0), dtype=np.float32)
+        return super().forward(batch)
+
+
+EMBEDDING_ENGINES = {"deepface": FacenetEngine, "onnx": OnnxFacenetEngine}
+
+_engine = None
+
+
+def get_embedding_engine() -> FacenetEngine:
+    """Return the process-wide embedding engine selected by ``EMBED_ENGINE``."""
+    global _engine
+    if _engine is None:
+        _engine = EMBEDDING_ENGINES[EMBED_ENGINE]()
+    return _engine
+
+
+_fast_engine = None
+
+
+def get_fast_engine() -> MobileFaceNetEngine:
+    """Return the process-wide first-tier engine of the model cascade."""
+    global _fast_engine
+    if _fast_engine is None:
+        _fast_engine = MobileFaceNetEngine()
+    return _fast_engine
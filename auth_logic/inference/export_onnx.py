@@ -0,0 +1,61 @@
+# export_onnx.py
+"""Export the DeepFace Facenet model to ONNX for the ONNX Runtime engine.
+
+Usage:
+    python -m auth_logic.inference.export_onnx [--output models/facenet.onnx] [--int8] [--opset 13]
+
+Needs TensorFlow, DeepFace and tf2onnx at export time only; serving with
+EMBED_ENGINE = "onnx" needs just onnxruntime. ``--int8`` also writes a
+dynamically quantised copy to ONNX_INT8_MODEL_PATH.
+"""
+
+import os
+import argparse
+import logging
+
+from auth_logic.usr_constants.embed_cfg import EMB_MODEL, ONNX_INT8_MODEL_PATH, ONNX_MODEL_PATH
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger("OnnxExport")
+
+
+def export_facenet(output: str = ONNX_MODEL_PATH, opset: int = 13) -> str:
+    """Convert the Keras model with a dynamic batch dimension and NHWC input."""
+    import tensorflow as tf
+    import tf2onnx
+    from deepface import DeepFace
+
+    model = DeepFace.build_model(EMB_MODEL)
+    _, height, width, channels = model.input_shape
+    signature = [tf.TensorSpec((None, height, width, channels), tf.float32, name="input")]
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    tf2onnx.convert.from_keras(model, input_signature=signature, opset=opset, output_path=output)
+    log.info(f"Exported {EMB_MODEL} to {output} ({os.path.getsize(output) / 1e6:.1f} MB).")
+    return output
+
+
+def quantize_int8(source: str = ONNX_MODEL_PATH, output: str = ONNX_INT8_MODEL_PATH) -> str:
+    """Dynamic int8 quantisation of the weights; activations stay float."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(source, output, weight_type=QuantType.QInt8)
+    log.info(f"Wrote int8 model to {output} ({os.path.getsize(output) / 1e6:.1f} MB).")
+    return output
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default=ONNX_MODEL_PATH)
+    parser.add_argument("--int8", action="store_true", help="Also write a dynamically quantised copy.")
+    parser.add_argument("--int8-output", default=ONNX_INT8_MODEL_PATH)
+    parser.add_argument("--opset", type=int, default=13)
+    args = parser.parse_args(argv)
+
+    path = export_facenet(args.output, args.opset)
+    if args.int8:
+        quantize_int8(path, args.int8_output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# gallery_index.py
+
+import sys
+import time
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from auth_logic.usr_constants.embed_cfg import EMBEDDING_SIZE
+from auth_logic.usr_constants.serve_cfg import (
+    IDENTIFY_INDEX_MODE,
+    IDENTIFY_IVF_LISTS,
+    IDENTIFY_IVF_MIN_SIZE,
+    IDENTIFY_IVF_PROBES,
+)
+from auth_logic.usr_exceptions.error_handler import CustomError
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger("GalleryIndex")
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise each row of a float32 matrix."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class _Partition:
+    """Growable block of normalised vectors and the user ids they belong to."""
+
+    def __init__(self, dim: int, vectors: Optional[np.ndarray] = None, ids: Optional[List[str]] = None) -> None:
+        self.ids: List[str] = list(ids or [])
+        capacity = max(len(self.ids), 16)
+        self.vectors = np.empty((capacity, dim), dtype=np.float32)
+        if self.ids:
+            self.vectors[:len(self.ids)] = vectors
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self.vectors[:len(self.ids)]
+
+    def append(self, user_id: str, vector: np.ndarray) -> int:
+        row = len(self.ids)
+        if row == len(self.vectors):
+            grown = np.empty((row * 2, self.vectors.shape[1]), dtype=np.float32)
+            grown[:row] = self.vectors
+            self.vectors = grown
+        self.vectors[row] = vector
+        self.ids.append(user_id)
+        return row
+
+    def remove(self, row: int) -> Optional[str]:
+        """Drop a row by moving the last row into its place; returns the moved id."""
+        last = len(self.ids) - 1
+        moved = None
+        if row != last:
+            self.vectors[row] = self.vectors[last]
+            self.ids[row] = self.ids[last]
+            moved = self.ids[row]
+        self.ids.pop()
+        return moved
+
+
+def spherical_kmeans(data: np.ndarray, n_clusters: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Cluster normalised vectors by cosine similarity; returns normalised centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assign = assign_clusters(data, centroids)
+        counts = np.bincount(assign, minlength=n_clusters)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        filled = counts > 0
+        sums = np.empty_like(centroids)
+        sums[filled] = np.add.reduceat(data[np.argsort(assign, kind="stable")], starts[filled], axis=0)
+        # Re-seed empty clusters from random points
+        sums[~filled] = data[rng.choice(len(data), size=int((~filled).sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+def assign_clusters(data: np.ndarray, centroids: np.ndarray, chunk: int = 16384) -> np.ndarray:
+    """Nearest centroid per row, computed in chunks to bound memory."""
+    assign = np.empty(len(data), dtype=np.int32)
+    for start in range(0, len(data), chunk):
+        assign[start:start + chunk] = np.argmax(data[start:start + chunk] @ centroids.T, axis=1)
+    return assign
+
+
+class GalleryIndex:
+    """In-memory 1:N index over every enrolled user's embedding.
+
+    Vectors are stored L2-normalised as float32 so a probe is scored with a
+    single matrix-vector product. In flat mode there is one partition; in IVF
+    mode vectors are split into cosine k-means partitions and only the
+    ``n_probe`` partitions nearest the probe are scanned.
+
+    Upserts and removals made while ``load`` reads the collection are
+    journaled and replayed onto the new index, so a slow load never drops them.
+    """
+
+    def __init__(
+        self,
+        dim: int = EMBEDDING_SIZE,
+        mode: str = IDENTIFY_INDEX_MODE,
+        n_lists: int = IDENTIFY_IVF_LISTS,
+        n_probe: int = IDENTIFY_IVF_PROBES,
+        ivf_min_size: int = IDENTIFY_IVF_MIN_SIZE,
+    ) -> None:
+        self.dim = dim
+        self.mode = mode
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.ivf_min_size = ivf_min_size
+        self.loaded = False
+        self._lock = threading.RLock()
+        self._centroids: Optional[np.ndarray] = None
+        self._parts: List[_Partition] = [_Partition(dim)]
+        self._where: Dict[str, Tuple[int, int]] = {}
+        # user id -> normalised vector, or None for a removal, while a load is running
+        self._journal: Optional[Dict[str, Optional[np.ndarray]]] = None
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def _use_ivf(self, size: int) -> bool:
+        if self.mode == "ivf":
+            return size >= self.n_lists
+        return self.mode == "auto" and size >= max(self.ivf_min_size, self.n_lists)
+
+    def build(self, user_ids: List[str], vectors: np.ndarray) -> None:
+        """Replace the index contents with the given users and vectors."""
+        vectors = normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+        centroids = None
+        if self._use_ivf(len(user_ids)):
+            sample = vectors
+            if len(vectors) > self.n_lists * 64:
+                sample = vectors[np.random.default_rng(0).choice(len(vectors), self.n_lists * 64, replace=False)]
+            centroids = spherical_kmeans(sample, self.n_lists)
+            assign = assign_clusters(vectors, centroids)
+        else:
+            assign = np.zeros(len(user_ids), dtype=np.int32)
+
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(len(centroids) if centroids is not None else 1), side="left")
+        bounds = np.append(bounds, len(order))
+        ids = np.asarray(user_ids, dtype=object)
+        parts, where = [], {}
+        for cluster in range(len(bounds) - 1):
+            rows = order[bounds[cluster]:bounds[cluster + 1]]
+            part_ids = ids[rows].tolist()
+            parts.append(_Partition(self.dim, vectors[rows], part_ids))
+            for row, user_id in enumerate(part_ids):
+                where[user_id] = (cluster, row)
+
+        with self._lock:
+            self._centroids = centroids
+            self._parts = parts
+            self._where = where
+            journal, self._journal = self._journal, None
+            for user_id, vector in (journal or {}).items():
+                self._remove_locked(user_id)
+                if vector is not None:
+                    self._append_locked(user_id, vector)
+            self.loaded = True
+
+    def load(self, records: Iterable[Tuple[str, np.ndarray]]) -> None:
+        """Build the index from ``(user_id, embedding)`` pairs, e.g. the embedding collection."""
+        try:
+            start = time.perf_counter()
+            with self._lock:
+                self._journal = {}
+            user_ids, vectors = [], []
+            for user_id, embedding in records:
+                user_ids.append(user_id)
+                vectors.append(np.asarray(embedding, dtype=np.float32).reshape(-1))
+            matrix = np.stack(vectors) if vectors else np.empty((0, self.dim), dtype=np.float32)
+            self.build(user_ids, matrix)
+            log.info(
+                f"Gallery index loaded {len(user_ids)} users in "
+                f"{(time.perf_counter() - start) * 1000:.1f} ms ({self.stats()['mode']} mode)."
+            )
+        except Exception as e:
+            with self._lock:
+                self._journal = None
+            raise CustomError(e, sys) from e
+
+    def upsert(self, user_id: str, embedding) -> None:
+        """Add or replace one user's vector."""
+        vector = normalize_rows(np.asarray(embedding, dtype=np.float32).reshape(1, self.dim))[0]
+        with self._lock:
+            if self._journal is not None:
+                self._journal[user_id] = vector
+            self._remove_locked(user_id)
+            self._append_locked(user_id, vector)
+
+    def remove(self, user_id: str) -> None:
+        """Drop a user from the index if present."""
+        with self._lock:
+            if self._journal is not None:
+                self._journal[user_id] = None
+            self._remove_locked(user_id)
+
+    def _append_locked(self, user_id: str, vector: np.ndarray) -> None:
+        cluster = 0
+        if self._centroids is not None:
+            cluster = int(np.argmax(self._centroids @ vector))
+        row = self._parts[cluster].append(user_id, vector)
+        self._where[user_id] = (cluster, row)
+
+    def _remove_locked(self, user_id: str) -> None:
+        location = self._where.pop(user_id, None)
+        if location is None:
+            return
+        cluster, row = location
+        moved = self._parts[cluster].remove(row)
+        if moved is not None:
+            self._where[moved] = (cluster, row)
+
+    def search(self, probe, k: int = 5) -> List[Tuple[str, float]]:
+        """Return the top-k ``(user_id, cosine score)`` pairs for a probe embedding."""
+        query = normalize_rows(np.asarray(probe, dtype=np.float32).reshape(1, self.dim))[0]
+        with self._lock:
+            if self._centroids is None:
+                parts = self._parts
+            else:
+                n_probe = min(self.n_probe, len(self._centroids))
+                nearest = np.argpartition(-(self._centroids @ query), n_probe - 1)[:n_probe]
+                parts = [self._parts[cluster] for cluster in nearest]
+            # Keep only each partition's local top-k so large galleries never build id lists
+            top_scores, top_ids = [], []
+            for part in parts:
+                if not part.ids:
+                    continue
+                scores = part.matrix @ query
+                local_k = min(k, len(scores))
+                top = np.argpartition(-scores, local_k - 1)[:local_k]
+                top_scores.extend(scores[top].tolist())
+                top_ids.extend(part.ids[i] for i in top)
+        ranked = sorted(zip(top_ids, top_scores), key=lambda pair: -pair[1])
+        return ranked[:k]
+
+    def stats(self) -> dict:
+        """Size and layout of the index."""
+        sizes = [len(part.ids) for part in self._parts]
+        return {
+            "users": len(self),
+            "mode": "flat" if self._centroids is None else "ivf",
+            "partitions": len(sizes),
+            "largest_partition": max(sizes) if sizes else 0,
+            "n_probe": self.n_probe if self._centroids is not None else None,
+            "memory_mb": round(sum(part.vectors.nbytes for part in self._parts) / (1024 * 1024), 2),
+        }
+
+
+gallery_index = GalleryIndex()
@@ -0,0 +1,207 @@
+# model_registry.py
+
+import os
+import sys
+import time
+import queue
+import logging
+import resource
+import threading
+import functools
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional
+
+from auth_logic.usr_constants.embed_cfg import (
+    EMB_MODEL,
+    EMBED_ENGINE,
+    FAST_EMBED_MODEL_PATH,
+    LANDMARK_BACKEND,
+    LANDMARK_MODEL_PATH,
+    MODEL_CASCADE_ENABLED,
+    MODEL_POOL_SIZE,
+    ONNX_INT8_MODEL_PATH,
+    ONNX_INTER_OP_THREADS,
+    ONNX_INTRA_OP_THREADS,
+    ONNX_MODEL_PATH,
+    ONNX_USE_INT8,
+)
+from auth_logic.usr_exceptions.error_handler import CustomError
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger("ModelRegistry")
+
+
+def current_rss_mb() -> float:
+    """Return the resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is a high-water mark, good enough where /proc is missing
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class _ModelEntry:
+    """Loader plus the loaded handle(s) for a single named model."""
+
+    def __init__(self, loader: Callable, pool_size: Optional[int], warm: bool) -> None:
+        self.loader = loader
+        self.pool_size = pool_size
+        self.warm = warm
+        self.shared = None
+        self.pool: Optional[queue.Queue] = None
+        self.loaded = False
+        self.load_ms = 0.0
+        self.rss_delta_mb = 0.0
+
+
+class ModelRegistry:
+    """Loads heavy models once per process and hands out shared handles.
+
+    Models registered with ``pool_size=None`` are shared as a single instance
+    (for objects that are safe to call from several threads). Models with an
+    integer ``pool_size`` get that many instances, and ``acquire`` checks one
+    out exclusively for the duration of the ``with`` block.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, _ModelEntry] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable, pool_size: Optional[int] = None, warm: bool = True) -> None:
+        """Register a loader for a named model without loading it.
+
+        ``warm=False`` keeps the model out of the default warmup set; it is
+        still loaded on first use.
+        """
+        with self._lock:
+            self._entries[name] = _ModelEntry(loader, pool_size, warm)
+
+    def _load(self, name: str) -> _ModelEntry:
+        try:
+            entry = self._entries[name]
+        except KeyError as e:
+            raise CustomError(e, sys) from e
+        if entry.loaded:
+            return entry
+        with self._lock:
+            if entry.loaded:
+                return entry
+            try:
+                rss_before = current_rss_mb()
+                start = time.perf_counter()
+                if entry.pool_size is None:
+                    entry.shared = entry.loader()
+                else:
+                    entry.pool = queue.Queue(maxsize=entry.pool_size)
+                    for _ in range(entry.pool_size):
+                        entry.pool.put(entry.loader())
+                entry.load_ms = (time.perf_counter() - start) * 1000
+                entry.rss_delta_mb = current_rss_mb() - rss_before
+                entry.loaded = True
+            except Exception as e:
+                raise CustomError(e, sys) from e
+        log.info(
+            f"Loaded model '{name}' in {entry.load_ms:.1f} ms "
+            f"(+{entry.rss_delta_mb:.1f} MB RSS, pool={entry.pool_size or 'shared'})."
+        )
+        return entry
+
+    def get(self, name: str):
+        """Return the shared instance of a model registered without a pool."""
+        entry = self._load(name)
+        if entry.pool is not None:
+            raise CustomError(ValueError(f"Model '{name}' is pooled, use acquire()."), sys)
+        return entry.shared
+
+    @contextmanager
+    def acquire(self, name: str):
+        """Check out a model handle, blocking until a pooled one is free."""
+        entry = self._load(name)
+        if entry.pool is None:
+            yield entry.shared
+            return
+        handle = entry.pool.get()
+        try:
+            yield handle
+        finally:
+            entry.pool.put(handle)
+
+    def warmup(self, names: Optional[Iterable[str]] = None) -> Dict[str, dict]:
+        """Load the given models (every model registered with ``warm=True`` by default)."""
+        if names is None:
+            names = self.warm_names()
+        for name in list(names):
+            try:
+                self._load(name)
+            except CustomError as e:
+                log.error(f"Warmup failed for model '{name}': {e}")
+        return self.report()
+
+    def warm_names(self) -> List[str]:
+        """Names of the models registered with ``warm=True``."""
+        return [name for name, entry in self._entries.items() if entry.warm]
+
+    def is_loaded(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return bool(entry and entry.loaded)
+
+    def report(self) -> Dict[str, dict]:
+        """Return load time and memory figures for every registered model."""
+        return {
+            name: {
+                "loaded": entry.loaded,
+                "load_ms": round(entry.load_ms, 2),
+                "rss_delta_mb": round(entry.rss_delta_mb, 2),
+                "pool_size": entry.pool_size,
+            }
+            for name, entry in self._entries.items()
+        }
+
+
+def _load_mp_face_detector():
+    import mediapipe as mp
+    return mp.solutions.face_detection.FaceDetection(model_selection=1, min_detection_confidence=0.5)
+
+
+def _load_landmark_predictor():
+    import dlib
+    return dlib.shape_predictor(LANDMARK_MODEL_PATH)
+
+
+def _load_face_mesh():
+    import mediapipe as mp
+    return mp.solutions.face_mesh.FaceMesh(static_image_mode=True, max_num_faces=1, refine_landmarks=False)
+
+
+def _load_embedding_model():
+    from deepface import DeepFace
+    return DeepFace.build_model(EMB_MODEL)
+
+
+def _load_onnx_embedding_model(path: Optional[str] = None):
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = ONNX_INTRA_OP_THREADS
+    options.inter_op_num_threads = ONNX_INTER_OP_THREADS
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    path = path or (ONNX_INT8_MODEL_PATH if ONNX_USE_INT8 else ONNX_MODEL_PATH)
+    return ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+
+
+model_registry = ModelRegistry()
+# MediaPipe graphs and dlib's HOG detector keep per-call state, so they are pooled.
+model_registry.register("face_detector", _load_mp_face_detector, pool_size=MODEL_POOL_SIZE)
+# The shape predictor is read-only after loading and ~100 MB, so one copy is shared.
+model_registry.register("landmark_predictor", _load_landmark_predictor, warm=LANDMARK_BACKEND == "dlib")
+model_registry.register("face_mesh", _load_face_mesh, pool_size=MODEL_POOL_SIZE, warm=LANDMARK_BACKEND == "mediapipe")
+model_registry.register("embedding_model", _load_embedding_model, warm=EMBED_ENGINE == "deepface")
+# InferenceSession.run is thread-safe, so the ONNX session is shared as well.
+model_registry.register("onnx_embedding_model", _load_onnx_embedding_model, warm=EMBED_ENGINE == "onnx")
+model_registry.register(
+    "fast_embedding_model",
+    functools.partial(_load_onnx_embedding_model, FAST_EMBED_MODEL_PATH),
+    warm=MODEL_CASCADE_ENABLED,
+)
@@ -4,3 +4,33 @@ SIM_THRESH = 0.75
 DET_BACKEND = "mediapipe"
 FORCE_DET = False
 EMB_MODEL = "Facenet"
+EMB_MODEL_ID = EMB_MODEL.lower()  # Template key of the primary model in embedding records
+LANDMARK_MODEL_PATH = "shape_predictor_68_face_landmarks.dat"
+MODEL_POOL_SIZE = 2
+WARMUP_ON_START = True
+EMBED_STORE_DTYPE = "float32"  # float32, float16 or int8
+ALIGN_FACES = True
+DETECT_MAX_SIDE = 640  # Longest side for face detection; 0 detects at full resolution
+QUALITY_TOP_K = 4  # Frames embedded per request after quality ranking; 0 embeds every face
+QUALITY_WEIGHTED_AVG = True
+QUALITY_BLUR_REF = 100.0  # Laplacian variance treated as fully sharp
+QUALITY_FACE_PX = 160  # Face side treated as full size
+LIVENESS_EAR_CLOSED = 0.2  # Eye aspect ratio below which the eyes count as closed
+LIVENESS_EAR_OPEN = 0.25  # Eye aspect ratio above which the eyes count as open
+LANDMARK_BACKEND = "dlib"  # Eye landmark backend: "dlib" (68-point predictor) or "mediapipe" (face mesh)
+EMBED_ENGINE = "deepface"  # "deepface" (TensorFlow) or "onnx" (ONNX Runtime on CPU)
+ONNX_MODEL_PATH = "models/facenet.onnx"
+ONNX_INT8_MODEL_PATH = "models/facenet.int8.onnx"
+ONNX_USE_INT8 = False  # Use the dynamically quantised export
+ONNX_INTRA_OP_THREADS = 1  # Threads per forward pass; workers already run requests in parallel
+ONNX_INTER_OP_THREADS = 1
+MODEL_CASCADE_ENABLED = False  # Try the fast model first and escalate to Facenet only near its threshold
+FAST_EMBED_MODEL_PATH = "models/mobilefacenet.onnx"
+FAST_SIM_THRESH = 0.6  # Cosine threshold on the fast model's scale
+MODEL_CASCADE_BAND = 0.1  # Fast-model scores within this distance of FAST_SIM_THRESH escalate
+TEMPLATE_MODE = "frames"  # Enrollment templates: "frames" (one per selected frame) or "kmeans" (centroids)
+TEMPLATE_KMEANS_K = 3
+TEMPLATE_SCORE = "max"  # Aggregation over a user's templates: "max", "mean" or "topk"
+TEMPLATE_SCORE_TOP_K = 3
+PROBE_SCORE = "mean"  # Aggregation over a request's probe frames (quality-weighted): "mean", "max" or "topk"
+PROBE_SCORE_TOP_K = 3
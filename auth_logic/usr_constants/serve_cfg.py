@@ -0,0 +1,67 @@
+from auth_logic.utils.util import CommonUtils
+
+# "thread" or "process" pool for face verification work
+VERIFY_EXECUTOR_KIND = CommonUtils().get_env_var("VERIFY_EXECUTOR_KIND") or "thread"
+VERIFY_EXECUTOR_WORKERS = int(CommonUtils().get_env_var("VERIFY_EXECUTOR_WORKERS") or 2)
+MAX_CONCURRENT_VERIFICATIONS = int(CommonUtils().get_env_var("MAX_CONCURRENT_VERIFICATIONS") or 4)
+# Thread pool for bcrypt and MongoDB calls, which release the GIL
+IO_EXECUTOR_WORKERS = int(CommonUtils().get_env_var("IO_EXECUTOR_WORKERS") or 8)
+
+# Cross-request micro-batching of embedding forward passes
+BATCH_SCHEDULER_ENABLED = (CommonUtils().get_env_var("BATCH_SCHEDULER_ENABLED") or "true").lower() == "true"
+BATCH_MAX_SIZE = int(CommonUtils().get_env_var("BATCH_MAX_SIZE") or 32)
+BATCH_MAX_WAIT_MS = float(CommonUtils().get_env_var("BATCH_MAX_WAIT_MS") or 5)
+
+# 1:N identification gallery
+IDENTIFY_ENABLED = (CommonUtils().get_env_var("IDENTIFY_ENABLED") or "true").lower() == "true"
+IDENTIFY_TOP_K = int(CommonUtils().get_env_var("IDENTIFY_TOP_K") or 5)
+IDENTIFY_MAX_TOP_K = int(CommonUtils().get_env_var("IDENTIFY_MAX_TOP_K") or 20)
+# Comma-separated user UUIDs allowed to call /identify; empty means nobody
+IDENTIFY_OPERATORS = frozenset(
+    uid.strip() for uid in (CommonUtils().get_env_var("IDENTIFY_OPERATORS") or "").split(",") if uid.strip()
+)
+# "flat", "ivf" or "auto" (ivf once the gallery reaches IDENTIFY_IVF_MIN_SIZE)
+IDENTIFY_INDEX_MODE = CommonUtils().get_env_var("IDENTIFY_INDEX_MODE") or "auto"
+IDENTIFY_IVF_MIN_SIZE = int(CommonUtils().get_env_var("IDENTIFY_IVF_MIN_SIZE") or 50000)
+IDENTIFY_IVF_LISTS = int(CommonUtils().get_env_var("IDENTIFY_IVF_LISTS") or 1024)
+IDENTIFY_IVF_PROBES = int(CommonUtils().get_env_var("IDENTIFY_IVF_PROBES") or 16)
+
+# LRU/TTL caches in front of the user and embedding collections
+RECORD_CACHE_TTL_S = float(CommonUtils().get_env_var("RECORD_CACHE_TTL_S") or 300)
+RECORD_CACHE_MAX_ENTRIES = int(CommonUtils().get_env_var("RECORD_CACHE_MAX_ENTRIES") or 10000)
+RECORD_CACHE_MAX_MB = float(CommonUtils().get_env_var("RECORD_CACHE_MAX_MB") or 64)
+
+# WebSocket streaming verification
+STREAM_MAX_FRAMES = int(CommonUtils().get_env_var("STREAM_MAX_FRAMES") or 8)
+STREAM_MIN_FRAMES = int(CommonUtils().get_env_var("STREAM_MIN_FRAMES") or 2)
+STREAM_TIMEOUT_S = float(CommonUtils().get_env_var("STREAM_TIMEOUT_S") or 10)
+STREAM_SIM_MARGIN = float(CommonUtils().get_env_var("STREAM_SIM_MARGIN") or 0.05)
+
+# Upload limits for the streamed multipart parser: oversized image parts fail the
+# request with 400, oversized text fields are dropped
+MAX_IMAGE_PART_BYTES = int(CommonUtils().get_env_var("MAX_IMAGE_PART_BYTES") or 8 * 1024 * 1024)
+MAX_TEXT_FIELD_BYTES = int(CommonUtils().get_env_var("MAX_TEXT_FIELD_BYTES") or 4096)
+
+# Cascaded login verification: embed a few frames at a time and stop on a clear margin
+CASCADE_ENABLED = (CommonUtils().get_env_var("CASCADE_ENABLED") or "true").lower() == "true"
+CASCADE_BATCH_SIZE = int(CommonUtils().get_env_var("CASCADE_BATCH_SIZE") or 2)
+CASCADE_MIN_FRAMES = int(CommonUtils().get_env_var("CASCADE_MIN_FRAMES") or 2)
+CASCADE_SIM_MARGIN = float(CommonUtils().get_env_var("CASCADE_SIM_MARGIN") or 0.05)
+CASCADE_BUDGET_MS = float(CommonUtils().get_env_var("CASCADE_BUDGET_MS") or 1500)
+
+# Memo of face-crop embeddings keyed by a perceptual hash (duplicate frames, quick retries)
+EMBED_MEMO_ENABLED = (CommonUtils().get_env_var("EMBED_MEMO_ENABLED") or "true").lower() == "true"
+EMBED_MEMO_TTL_S = float(CommonUtils().get_env_var("EMBED_MEMO_TTL_S") or 60)
+EMBED_MEMO_MAX_ENTRIES = int(CommonUtils().get_env_var("EMBED_MEMO_MAX_ENTRIES") or 2048)
+
+# Opt-in per-request profiling (middleware is not installed unless enabled)
+PROFILE_ENABLED = (CommonUtils().get_env_var("PROFILE_ENABLED") or "false").lower() == "true"
+# Requests whose PROFILE_HEADER matches this token are profiled; empty disables the header trigger
+PROFILE_TOKEN = CommonUtils().get_env_var("PROFILE_TOKEN") or ""
+PROFILE_HEADER = CommonUtils().get_env_var("PROFILE_HEADER") or "x-profile-token"
+PROFILE_SAMPLE_RATE = float(CommonUtils().get_env_var("PROFILE_SAMPLE_RATE") or 0.0)
+# "cprofile" writes .pstats files, "sample" writes collapsed stacks for flame graphs
+PROFILE_MODE = CommonUtils().get_env_var("PROFILE_MODE") or "cprofile"
+PROFILE_SAMPLE_INTERVAL_MS = float(CommonUtils().get_env_var("PROFILE_SAMPLE_INTERVAL_MS") or 5)
+PROFILE_MAX_FILES = int(CommonUtils().get_env_var("PROFILE_MAX_FILES") or 50)
+PROFILE_MAX_MB = float(CommonUtils().get_env_var("PROFILE_MAX_MB") or 200)
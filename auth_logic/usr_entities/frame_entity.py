@@ -0,0 +1,71 @@
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+class FrameData:
+    """A single uploaded frame, decoded once into a contiguous BGR uint8 array."""
+
+    __slots__ = ("bgr", "_gray", "_rgb", "analysis", "analysed")
+
+    def __init__(self, bgr: np.ndarray) -> None:
+        self.bgr = np.ascontiguousarray(bgr, dtype=np.uint8)
+        self._gray = None
+        self._rgb = None
+        # Single face-analysis result shared by liveness and embedding
+        self.analysis = None
+        self.analysed = False
+
+    @classmethod
+    def from_bytes(cls, data) -> "FrameData":
+        """Decode encoded image bytes (JPEG, PNG, WebP...) straight to BGR.
+
+        The buffer is wrapped through a memoryview, so bytes and bytearray
+        uploads are decoded without an intermediate copy.
+        """
+        bgr = cv2.imdecode(np.frombuffer(memoryview(data), dtype=np.uint8), cv2.IMREAD_COLOR)
+        if bgr is None:
+            raise ValueError("Could not decode image data.")
+        return cls(bgr)
+
+    @classmethod
+    def wrap(cls, image) -> "FrameData":
+        """Return ``image`` as a FrameData, decoding bytes or wrapping a BGR array."""
+        if isinstance(image, cls):
+            return image
+        if isinstance(image, np.ndarray):
+            return cls(image)
+        return cls.from_bytes(image)
+
+    @property
+    def gray(self) -> np.ndarray:
+        """Grayscale view, converted on first access."""
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """RGB view, converted on first access."""
+        if self._rgb is None:
+            self._rgb = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB)
+        return self._rgb
+
+    @property
+    def cached_gray(self) -> Optional[np.ndarray]:
+        """Grayscale view if it was already converted, else None."""
+        return self._gray
+
+    @property
+    def cached_rgb(self) -> Optional[np.ndarray]:
+        """RGB view if it was already converted, else None."""
+        return self._rgb
+
+    @property
+    def shape(self) -> tuple:
+        return self.bgr.shape
+
+    def __repr__(self) -> str:
+        """String representation of the frame."""
+        return f"FrameData(shape={self.bgr.shape})"
@@ -0,0 +1,187 @@
+# metrics.py
+
+import time
+import bisect
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger("Metrics")
+
+# Seconds; covers sub-millisecond cache hits up to slow multi-frame logins
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Stage timings of the request being served: {stage: seconds}. Executor jobs
+# started through utility.worker_pool run in a copy of the caller's context,
+# so they add to the same dict.
+_request_stages: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "request_stages", default=None
+)
+
+
+def _label_key(labels: dict) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Monotonic counter with optional labels, or one read from a callback at scrape time.
+
+    A callback returns ``{label_key: value}`` for totals that another
+    component already keeps (cache hit counts, model load figures).
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, callback: Optional[Callable[[], Dict[tuple, float]]] = None) -> None:
+        self.name = name
+        self.help = help_text
+        self.callback = callback
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[Tuple[str, tuple, str, float]]:
+        if self.callback is not None:
+            try:
+                collected = self.callback()
+                with self._lock:
+                    self._values.update(collected)
+            except Exception as e:
+                log.warning(f"Metric callback {self.name} failed: {e}")
+        with self._lock:
+            return [(self.name, key, "", value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Value that goes up and down."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+
+class Histogram:
+    """Fixed-bucket histogram; one bisect and one lock per observation."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (plus +Inf), sum, count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for key, (counts, total, count) in self._series.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    out.append((f"{self.name}_bucket", key, f'le="{le}"', cumulative))
+                out.append((f"{self.name}_sum", key, "", total))
+                out.append((f"{self.name}_count", key, "", count))
+        return out
+
+
+class MetricsRegistry:
+    """Holds every metric of the process and renders the Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, callback=None) -> Counter:
+        return self._add(Counter(name, help_text, callback))
+
+    def gauge(self, name: str, help_text: str, callback=None) -> Gauge:
+        return self._add(Gauge(name, help_text, callback))
+
+    def histogram(self, name: str, help_text: str, buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help_text, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, extra, value in metric.samples():
+                lines.append(f"{name}{_format_labels(key, extra)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram("auth_stage_seconds", "Time spent in each verification stage.")
+REQUEST_SECONDS = metrics.histogram("http_request_seconds", "HTTP request latency by route, method and status.")
+REQUESTS_IN_FLIGHT = metrics.gauge("http_requests_in_flight", "HTTP requests currently being served.")
+EXECUTOR_IN_FLIGHT = metrics.gauge("executor_jobs_in_flight", "Jobs submitted to a worker pool and not finished.")
+VERIFICATIONS = metrics.counter("face_verifications_total", "Face verification decisions by outcome.")
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """Add a measured duration to the stage histogram and the current request."""
+    STAGE_SECONDS.observe(seconds, stage=name)
+    stages = _request_stages.get()
+    if stages is not None:
+        stages[name] = stages.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as one verification stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def start_request() -> contextvars.Token:
+    """Begin collecting stage timings for a request in the current context."""
+    return _request_stages.set({})
+
+
+def finish_request(token: contextvars.Token) -> Dict[str, float]:
+    """Stop collecting and return the request's stage timings."""
+    stages = _request_stages.get() or {}
+    _request_stages.reset(token)
+    return stages
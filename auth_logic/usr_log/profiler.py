@@ -0,0 +1,172 @@
+# profiler.py
+
+import os
+import re
+import sys
+import time
+import pstats
+import cProfile
+import logging
+import threading
+import contextvars
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from auth_logic.usr_constants.serve_cfg import (
+    PROFILE_MAX_FILES,
+    PROFILE_MAX_MB,
+    PROFILE_MODE,
+    PROFILE_SAMPLE_INTERVAL_MS,
+)
+from auth_logic.usr_log.setup_logg import LOG_DIRECTORY
+
+log = logging.getLogger("Profiler")
+
+PROFILE_DIRECTORY = os.path.join(LOG_DIRECTORY, "profiles")
+
+# Only one cProfile profiler can be active per interpreter on newer Pythons,
+# so concurrently profiled jobs take turns
+_CPROFILE_LOCK = threading.Lock()
+
+# Session of the request being profiled; None for every other request
+_active_profile: contextvars.ContextVar[Optional["ProfileSession"]] = contextvars.ContextVar(
+    "active_profile", default=None
+)
+
+
+def active_profile() -> Optional["ProfileSession"]:
+    return _active_profile.get()
+
+
+class ProfileSession:
+    """CPU profile of one request's executor jobs.
+
+    Verification work runs on worker threads, so each job started through
+    utility.worker_pool is wrapped with ``run``. In ``cprofile`` mode every
+    job gets its own cProfile.Profile and the results are merged into one
+    pstats file; only one cProfile can run at a time, so a request's
+    concurrent jobs run one after another while profiled and its latency is
+    inflated by the lock wait, which is logged with the profile. In ``sample`` mode a background thread samples the stacks of
+    the threads currently running the request's jobs and writes collapsed
+    stacks (``frame;frame;frame count``) for flame-graph tools.
+    """
+
+    def __init__(self, label: str, mode: str = PROFILE_MODE, interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS) -> None:
+        self.label = label
+        self.mode = mode
+        self.interval = interval_ms / 1000
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stats: Optional[pstats.Stats] = None
+        self._jobs = 0
+        self._lock_wait = 0.0
+        self._threads = set()
+        self._samples = Counter()
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def activate(self) -> contextvars.Token:
+        return _active_profile.set(self)
+
+    def deactivate(self, token: contextvars.Token) -> None:
+        _active_profile.reset(token)
+
+    def run(self, func, *args, **kwargs):
+        """Run one executor job under this session's profiler."""
+        if self.mode == "sample":
+            return self._run_sampled(func, *args, **kwargs)
+        profile = cProfile.Profile()
+        waited = time.perf_counter()
+        try:
+            with _CPROFILE_LOCK:
+                waited = time.perf_counter() - waited
+                return profile.runcall(func, *args, **kwargs)
+        finally:
+            with self._lock:
+                self._jobs += 1
+                self._lock_wait += waited
+                if self._stats is None:
+                    self._stats = pstats.Stats(profile)
+                else:
+                    self._stats.add(profile)
+
+    def _run_sampled(self, func, *args, **kwargs):
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads.add(ident)
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample_loop, name="profile-sampler", daemon=True)
+                self._sampler.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._threads.discard(ident)
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                threads = list(self._threads)
+            if not threads:
+                continue
+            frames = sys._current_frames()
+            for ident in threads:
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if stack:
+                    self._samples[";".join(reversed(stack))] += 1
+
+    def finish(self, status: int) -> Optional[str]:
+        """Write the profile to the log directory and apply retention; returns the path."""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=1)
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        os.makedirs(PROFILE_DIRECTORY, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9]+", "_", self.label).strip("_") or "root"
+        stem = f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}_{name}_{status}_{elapsed_ms:.0f}ms"
+
+        if self.mode == "sample":
+            if not self._samples:
+                return None
+            path = os.path.join(PROFILE_DIRECTORY, stem + ".collapsed")
+            with open(path, "w") as out:
+                for stack, count in self._samples.most_common():
+                    out.write(f"{stack} {count}\n")
+        else:
+            if self._stats is None:
+                return None
+            path = os.path.join(PROFILE_DIRECTORY, stem + ".pstats")
+            self._stats.dump_stats(path)
+        prune_profiles()
+        log.info(f"Profile of {self.label} ({elapsed_ms:.0f} ms) written to {path}.")
+        if self.mode != "sample" and self._jobs > 1:
+            log.info(
+                f"{self._jobs} jobs of {self.label} were profiled one at a time; "
+                f"{self._lock_wait * 1000:.0f} ms of the request was spent waiting for the profiler lock."
+            )
+        return path
+
+
+def prune_profiles(max_files: int = PROFILE_MAX_FILES, max_mb: float = PROFILE_MAX_MB) -> None:
+    """Delete the oldest profiles beyond the file-count and total-size limits."""
+    try:
+        entries = [os.path.join(PROFILE_DIRECTORY, name) for name in os.listdir(PROFILE_DIRECTORY)]
+        files = sorted((os.path.getmtime(path), os.path.getsize(path), path) for path in entries if os.path.isfile(path))
+    except OSError as e:
+        log.warning(f"Could not list profiles for retention: {e}")
+        return
+    total = sum(size for _, size, _ in files)
+    budget = max_mb * 1024 * 1024
+    while files and (len(files) > max_files or total > budget):
+        _, size, path = files.pop(0)
+        try:
+            os.remove(path)
+            total -= size
+        except OSError as e:
+            log.warning(f"Could not remove old profile {path}: {e}")
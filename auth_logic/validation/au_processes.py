@@ -1,110 +1,136 @@
-import io
 import sys
 import logging
-from ast import Bytes
-from typing import List
+from typing import List, Optional, Tuple, Union
 import numpy as np
-from deepface import DeepFace
-from PIL import Image
-import mediapipe as mp
-import cv2
-from usr_constants.embed_cfg import DET_BACKEND, EMB_MODEL, FORCE_DET, SIM_THRESH
-from connect_data.usr_db_ops import UserDatabaseOperations
+from auth_logic.usr_constants.embed_cfg import EMB_MODEL_ID, MODEL_CASCADE_ENABLED, SIM_THRESH, QUALITY_TOP_K, QUALITY_WEIGHTED_AVG
+from auth_logic.usr_constants.serve_cfg import (
+    BATCH_SCHEDULER_ENABLED,
+    CASCADE_BATCH_SIZE,
+    CASCADE_BUDGET_MS,
+    CASCADE_ENABLED,
+    CASCADE_MIN_FRAMES,
+    CASCADE_SIM_MARGIN,
+    EMBED_MEMO_ENABLED,
+    IDENTIFY_TOP_K,
+)
+from auth_logic.connect_data.usr_emb_ops import EmbDataHandler
 from auth_logic.usr_exceptions.error_handler import CustomError
-from liveness_detection.blink_detection import BlinkDetector  # Import the BlinkDetector
+from auth_logic.usr_log.metrics import VERIFICATIONS, stage
+from auth_logic.usr_entities.frame_entity import FrameData
+from auth_logic.inference.embedding_engine import get_embedding_engine, get_fast_engine
+from auth_logic.inference.batch_scheduler import get_scheduler
+from auth_logic.inference.gallery_index import gallery_index
+from auth_logic.inference.embed_memo import embed_memo
+from auth_logic.validation.face_analysis import face_analyzer
+from auth_logic.validation.frame_quality import score_faces, select_top_k
+from auth_logic.validation.sequential_decision import PENDING, ACCEPT, SequentialDecision
+from auth_logic.validation.model_cascade import CascadeVerifier
+from auth_logic.validation.template_match import enrollment_templates, score_probe
+from liveness_detection.liveness import LivenessEngine
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger("EmbeddingOps")
 
-# Mediapipe setup
-mp_detect = mp.solutions.face_detection
-mp_draw = mp.solutions.drawing_utils
-
 class LoginCheck:
     def __init__(self, user_id: str) -> None:
         self.user_id = user_id
-        self.db = UserDatabaseOperations()
+        self.db = EmbDataHandler()
         self.user_data = self.db.get_embed(user_id)
-        self.blink_detector = BlinkDetector()  # Initialize BlinkDetector
+        self.liveness = LivenessEngine()  # Cheap: models come from the registry
 
     def check_valid(self) -> bool:
         """Check if user data is valid."""
         try:
-            if not self.user_data.get("ID") or not self.user_data.get("Embed"):
+            if not self.user_data or not self.user_data.get("user_id") or self.user_data.get("embed_data") is None:
                 log.warning(f"No valid data for user: {self.user_id}")
                 return False
             return True
         except Exception as e:
             raise CustomError(e, sys) from e
 
-    def detect_liveness(self, img: np.ndarray) -> bool:
-        """Detect liveness using blink detection."""
-        return self.blink_detector.detect_blinks(img)
+    def detect_liveness(self, frames: List[FrameData]) -> bool:
+        """Detect liveness from a blink across the frame sequence."""
+        with stage("liveness"):
+            return self.liveness.check(frames)
 
     @staticmethod
-    def get_face(img: np.ndarray) -> np.ndarray:
-        """Detect the closest face using Mediapipe."""
+    def get_face(frame: Union[FrameData, np.ndarray]) -> np.ndarray:
+        """Return the main face crop from the shared per-frame face analysis."""
         try:
-            with mp_detect.FaceDetection(model_selection=1, min_detection_confidence=0.5) as detect:
-                img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                results = detect.process(img_rgb)
-
-                if not results.detections:
-                    log.info("No face found.")
-                    return None
-
-                max_area = 0
-                main_face = None
-
-                for detection in results.detections:
-                    bbox = detection.location_data.relative_bounding_box
-                    h, w, _ = img.shape
-                    x, y, bw, bh = (int(bbox.xmin * w), int(bbox.ymin * h),
-                                    int(bbox.width * w), int(bbox.height * h))
-                    area = bw * bh
-                    if area > max_area:
-                        max_area = area
-                        main_face = img[y:y + bh, x:x + bw]
-
-                return main_face if main_face else None
-
+            analysis = face_analyzer.analyze(frame)
+            return None if analysis is None else analysis.crop
         except Exception as e:
             raise CustomError(e, sys) from e
 
     @staticmethod
-    def make_embed(face: np.ndarray) -> np.ndarray:
+    def make_embed(frame: Union[FrameData, np.ndarray]) -> np.ndarray:
         """Create embedding for the face."""
         try:
-            face = LoginCheck.get_face(face)
+            face = LoginCheck.get_face(frame)
             if face is None:
-                raise CustomError("No valid face.", sys)
-            
-            embed = DeepFace.represent(
-                img_path=face,
-                model_name=EMB_MODEL,
-                enforce_detection=FORCE_DET,
-            )
-            return embed
+                raise ValueError("No valid face.")
+            return LoginCheck.embed_faces([face])[0]
         except Exception as e:
             raise CustomError(e, sys) from e
 
     @staticmethod
-    def get_embeds(images: List[Bytes]) -> List[np.ndarray]:
-        """Generate list of embeddings from images."""
+    def select_faces(images: List[Union[FrameData, bytes]], top_k: int = QUALITY_TOP_K) -> Tuple[List[np.ndarray], np.ndarray]:
+        """Crops of the ``top_k`` best-quality faces and their quality scores."""
+        with stage("decode"):
+            frames = [FrameData.wrap(image) for image in images]
+        analyses = [face_analyzer.analyze(frame) for frame in frames]
+        with stage("quality"):
+            scores = score_faces(analyses)
+            keep = select_top_k(scores, top_k)
+        if not len(keep):
+            raise ValueError("No valid face.")
+        return [frames[i].analysis.crop for i in keep], scores[keep]
+
+    @staticmethod
+    def get_embeds(images: List[Union[FrameData, bytes]], top_k: int = QUALITY_TOP_K) -> np.ndarray:
+        """Embed the best faces of the set in one forward pass."""
         log.info("Creating embeddings from images.")
-        embeds = []
-        for data in images:
-            img = Image.open(io.BytesIO(data))
-            arr = np.array(img)
-            embed = LoginCheck.make_embed(arr)
-            embeds.append(embed)
-        return embeds
+        try:
+            faces, _ = LoginCheck.select_faces(images, top_k)
+            return LoginCheck.embed_faces(faces)
+        except Exception as e:
+            raise CustomError(e, sys) from e
+
+    @staticmethod
+    def build_template(
+        images: List[Union[FrameData, bytes]],
+        top_k: int = QUALITY_TOP_K,
+        weighted: bool = QUALITY_WEIGHTED_AVG,
+        scope: Optional[str] = None,
+    ) -> np.ndarray:
+        """Average embedding of the best faces, optionally weighted by their quality."""
+        try:
+            faces, scores = LoginCheck.select_faces(images, top_k)
+            embeds = LoginCheck.embed_faces(faces, scope)
+            return LoginCheck.avg_embeds(embeds, scores if weighted else None)
+        except Exception as e:
+            raise CustomError(e, sys) from e
+
+    @staticmethod
+    def embed_faces(faces: List[np.ndarray], scope: Optional[str] = None) -> np.ndarray:
+        """Embed face crops, reusing memoised duplicates and sharing forward passes when enabled."""
+        with stage("embedding"):
+            if EMBED_MEMO_ENABLED:
+                return embed_memo.embed(faces, LoginCheck.run_embedding, get_embedding_engine().model_id, scope)
+            return LoginCheck.run_embedding(faces)
+
+    @staticmethod
+    def run_embedding(faces: List[np.ndarray]) -> np.ndarray:
+        """Forward pass through the batch scheduler or directly on the engine."""
+        if BATCH_SCHEDULER_ENABLED:
+            return get_scheduler().embed(faces)
+        return get_embedding_engine().embed_batch(faces)
 
     @staticmethod
-    def avg_embeds(embeds: List[np.ndarray]) -> List:
-        """Compute average embedding."""
-        avg = np.mean(embeds, axis=0).tolist()
+    def avg_embeds(embeds: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """Compute average embedding, weighted when weights are given."""
+        avg = np.average(np.asarray(embeds, dtype=np.float32), axis=0, weights=weights).astype(np.float32)
         log.info("Average embedding calculated.")
         return avg
 
@@ -112,6 +138,8 @@ class LoginCheck:
     def calc_sim(db_embed, current_embed) -> bool:
         """Calculate similarity between embeddings."""
         try:
+            db_embed = np.asarray(db_embed, dtype=np.float32)
+            current_embed = np.asarray(current_embed, dtype=np.float32)
             similarity = np.dot(db_embed, current_embed) / (
                 np.linalg.norm(db_embed) * np.linalg.norm(current_embed)
             )
@@ -119,23 +147,34 @@ class LoginCheck:
         except Exception as e:
             raise CustomError(e, sys) from e
 
-    def match_embed(self, images: bytes) -> bool:
+    def match_embed(self, images: List[bytes]) -> bool:
         """Match current embed to stored data."""
         try:
             if self.check_valid():
-                for data in images:
-                    img = Image.open(io.BytesIO(data))
-                    arr = np.array(img)
-                    
-                    if not self.detect_liveness(arr):
-                        log.warning("Liveness check failed.")
-                        return False
-
-                embeds = self.get_embeds(images)
-                avg = self.avg_embeds(embeds)
-                
-                stored = self.user_data["Embed"]
-                sim = self.calc_sim(stored, avg)
+                # Decode each upload once; liveness and embedding share the frames
+                with stage("decode"):
+                    frames = [FrameData.from_bytes(data) for data in images]
+                if not self.detect_liveness(frames):
+                    log.warning("Liveness check failed.")
+                    return False
+
+                # Faces are selected once and shared by every model and scoring path
+                faces, scores = self.select_faces(frames)
+                weights = scores if QUALITY_WEIGHTED_AVG else None
+                if MODEL_CASCADE_ENABLED:
+                    fast = CascadeVerifier().decide(self.user_data["templates"], faces, weights, self.user_id)
+                    if fast != PENDING:
+                        log.info(f"User {self.user_id} {fast} by the fast model.")
+                        return fast == ACCEPT
+
+                if CASCADE_ENABLED:
+                    return self.cascade_match(faces, weights)
+
+                # Every selected frame is scored against every template; no averaged probe
+                embeds = self.embed_faces(faces, self.user_id)
+                templates = self.user_data["templates"][EMB_MODEL_ID]
+                with stage("similarity"):
+                    sim = score_probe(templates, embeds, weights)
 
                 if sim >= SIM_THRESH:
                     log.info(f"User {self.user_id} authenticated.")
@@ -149,17 +188,80 @@ class LoginCheck:
         except Exception as e:
             raise CustomError(e, sys) from e
 
+    def cascade_match(self, faces: List[np.ndarray], weights: Optional[np.ndarray] = None) -> bool:
+        """Embed the selected faces a few at a time, stopping once the score is clearly decided."""
+        decision = SequentialDecision(
+            self.user_data["templates"][EMB_MODEL_ID],
+            margin=CASCADE_SIM_MARGIN,
+            min_frames=CASCADE_MIN_FRAMES,
+            budget_ms=CASCADE_BUDGET_MS,
+        )
+        outcome = PENDING
+        for start in range(0, len(faces), CASCADE_BATCH_SIZE):
+            stop = start + CASCADE_BATCH_SIZE
+            decision.add(
+                self.embed_faces(faces[start:stop], self.user_id),
+                None if weights is None else weights[start:stop],
+            )
+            outcome = decision.decide(liveness=True, exhausted=stop >= len(faces))
+            if outcome != PENDING:
+                break
+
+        log.info(
+            f"User {self.user_id} {outcome} after {decision.count}/{len(faces)} frames "
+            f"(sim={decision.similarity:.4f}, {decision.elapsed_ms:.0f} ms)."
+        )
+        return outcome == ACCEPT
+
 class RegProcess:
     def __init__(self, user_id: str) -> None:
         self.user_id = user_id
-        self.db = UserDatabaseOperations()
+        self.db = EmbDataHandler()
 
-    def save_embed(self, images: bytes):
+    def save_embed(self, images: bytes) -> np.ndarray:
         """Save user embedding to DB."""
         try:
-            embeds = LoginCheck.get_embeds(images)
-            avg = LoginCheck.avg_embeds(embeds)
-            self.db.save_embed(self.user_id, avg)
+            # Faces are selected once; both models embed the same crops
+            with stage("decode"):
+                frames = [FrameData.wrap(image) for image in images]
+            faces, scores = LoginCheck.select_faces(frames)
+            embeds = LoginCheck.embed_faces(faces, self.user_id)
+            # The averaged vector feeds the 1:N gallery; verification scores the template matrix
+            avg = LoginCheck.avg_embeds(embeds, scores if QUALITY_WEIGHTED_AVG else None)
+            templates = {EMB_MODEL_ID: enrollment_templates(embeds)}
+            if MODEL_CASCADE_ENABLED:
+                # Templates for the fast tier of the model cascade, from the same faces
+                fast = get_fast_engine()
+                templates[fast.model_id] = enrollment_templates(fast.embed_batch(faces))
+            self.db.save_embed(self.user_id, avg, templates)
             log.info(f"Embeddings for user {self.user_id} saved.")
+            return avg
         except Exception as e:
             raise CustomError(e, sys) from e
+
+
+def verify_login_images(user_id: str, images: List[bytes]) -> bool:
+    """Run the full face check for a user; module-level so worker pools can pickle it."""
+    accepted = LoginCheck(user_id).match_embed(images)
+    VERIFICATIONS.inc(outcome="accept" if accepted else "reject")
+    return accepted
+
+
+def register_user_images(user_id: str, images: List[bytes]) -> np.ndarray:
+    """Store the enrollment embedding for a user; module-level for worker pools."""
+    return RegProcess(user_id).save_embed(images)
+
+
+def embed_probe_images(images: List[bytes]) -> np.ndarray:
+    """Average embedding of the faces in the frames, used as a 1:N probe."""
+    return LoginCheck.build_template(images)
+
+
+def identify_probe(probe: np.ndarray, top_k: int = IDENTIFY_TOP_K) -> List[dict]:
+    """Return the top-k enrolled users for a probe embedding."""
+    try:
+        matches = gallery_index.search(probe, top_k)
+        log.info(f"Identification returned {len(matches)} candidates.")
+        return [{"user_id": user_id, "score": round(score, 4)} for user_id, score in matches]
+    except Exception as e:
+        raise CustomError(e, sys) from e
@@ -0,0 +1,142 @@
+# face_analysis.py
+
+import sys
+import math
+import logging
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from auth_logic.usr_constants.embed_cfg import ALIGN_FACES, DETECT_MAX_SIDE
+from auth_logic.usr_exceptions.error_handler import CustomError
+from auth_logic.usr_log.metrics import stage
+from auth_logic.usr_entities.frame_entity import FrameData
+from auth_logic.inference.model_registry import model_registry
+from liveness_detection.landmark_backends import LandmarkBackend, get_landmark_backend
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger("FaceAnalysis")
+
+
+class FaceAnalysis:
+    """Everything the pipeline needs about the main face in one frame."""
+
+    __slots__ = ("box", "score", "eye_landmarks", "crop")
+
+    def __init__(self, box: Tuple[int, int, int, int], score: float, eye_landmarks: Optional[np.ndarray], crop: np.ndarray) -> None:
+        self.box = box  # x, y, w, h in source pixels
+        self.score = score
+        self.eye_landmarks = eye_landmarks  # (12, 2) float32, or None if not found
+        self.crop = crop  # BGR face crop, eye-aligned when landmarks are available
+
+    def __repr__(self) -> str:
+        return f"FaceAnalysis(box={self.box}, score={self.score:.2f}, eyes={self.eye_landmarks is not None})"
+
+
+class FaceAnalyzer:
+    """Detects the main face once per frame and derives landmarks and the crop from it.
+
+    MediaPipe finds the box on a copy downscaled to ``detect_max_side``, the
+    landmark backend places the eye points inside that box on a
+    full-resolution ROI (no second detection), and the crop is cut from the original frame
+    and rotated so the eyes are level. The result is cached on the FrameData,
+    so liveness and embedding never detect the same frame twice.
+    """
+
+    def __init__(
+        self,
+        registry=model_registry,
+        align: bool = ALIGN_FACES,
+        detect_max_side: int = DETECT_MAX_SIDE,
+        landmarks: Optional[LandmarkBackend] = None,
+    ) -> None:
+        self.registry = registry
+        self.landmarks = landmarks or get_landmark_backend(registry=registry)
+        self.align = align
+        self.detect_max_side = detect_max_side
+
+    def analyze(self, frame) -> Optional[FaceAnalysis]:
+        """Return the cached analysis for a frame, computing it on first use."""
+        frame = FrameData.wrap(frame)
+        if frame.analysed:
+            return frame.analysis
+        try:
+            frame.analysis = self._analyze(frame)
+            frame.analysed = True
+            return frame.analysis
+        except Exception as e:
+            raise CustomError(e, sys) from e
+
+    def _analyze(self, frame: FrameData) -> Optional[FaceAnalysis]:
+        with stage("detection"):
+            detected = self.detect(frame)
+        if detected is None:
+            log.info("No face found.")
+            return None
+        box, score = detected
+        with stage("landmarks"):
+            eyes = self.eye_landmarks(frame, box)
+        with stage("align"):
+            crop = self.crop(frame, box, eyes)
+        if crop is None:
+            return None
+        return FaceAnalysis(box, score, eyes, crop)
+
+    def detection_input(self, frame: FrameData) -> np.ndarray:
+        """RGB image for the detector, downscaled so its longest side fits ``detect_max_side``."""
+        h, w = frame.shape[:2]
+        scale = self.detect_max_side / max(h, w) if self.detect_max_side else 1.0
+        if scale >= 1.0:
+            return frame.rgb
+        small = cv2.resize(frame.bgr, (max(int(w * scale), 1), max(int(h * scale), 1)), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+
+    def detect(self, frame: FrameData) -> Optional[Tuple[Tuple[int, int, int, int], float]]:
+        """Largest MediaPipe detection as a clipped box in source pixels and its score."""
+        with self.registry.acquire("face_detector") as detect:
+            results = detect.process(self.detection_input(frame))
+        if not results.detections:
+            return None
+
+        # Boxes are relative, so scaling by the source size maps them back to full resolution
+        h, w = frame.shape[:2]
+        best, best_area = None, 0
+        for detection in results.detections:
+            bbox = detection.location_data.relative_bounding_box
+            x, y = max(int(bbox.xmin * w), 0), max(int(bbox.ymin * h), 0)
+            bw = min(int(bbox.width * w), w - x)
+            bh = min(int(bbox.height * h), h - y)
+            if bw * bh > best_area:
+                best_area = bw * bh
+                best = ((x, y, bw, bh), float(detection.score[0]))
+        return best if best_area > 0 else None
+
+    def eye_landmarks(self, frame: FrameData, box: Tuple[int, int, int, int]) -> Optional[np.ndarray]:
+        """Place the 12 eye landmarks inside a known face box with the configured backend."""
+        return self.landmarks.eye_landmarks(frame, box)
+
+    def crop(self, frame: FrameData, box: Tuple[int, int, int, int], eyes: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Cut the face out of the frame, levelling the eyes when they are known."""
+        x, y, bw, bh = box
+        if not self.align or eyes is None:
+            face = frame.bgr[y:y + bh, x:x + bw]
+            return face if face.size else None
+
+        # Rotate only a padded region around the face, never the whole frame
+        h, w = frame.shape[:2]
+        pad = int(0.25 * max(bw, bh))
+        x0, y0 = max(x - pad, 0), max(y - pad, 0)
+        x1, y1 = min(x + bw + pad, w), min(y + bh + pad, h)
+        roi = frame.bgr[y0:y1, x0:x1]
+        left, right = eyes[:6].mean(axis=0), eyes[6:].mean(axis=0)
+        angle = math.degrees(math.atan2(right[1] - left[1], right[0] - left[0]))
+        center = (float((left[0] + right[0]) / 2 - x0), float((left[1] + right[1]) / 2 - y0))
+        rotation = cv2.getRotationMatrix2D(center, angle, 1.0)
+        rotated = cv2.warpAffine(roi, rotation, (roi.shape[1], roi.shape[0]), flags=cv2.INTER_LINEAR)
+        face = rotated[y - y0:y - y0 + bh, x - x0:x - x0 + bw]
+        return face if face.size else None
+
+
+face_analyzer = FaceAnalyzer()
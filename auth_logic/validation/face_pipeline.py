@@ -0,0 +1,50 @@
+# face_pipeline.py
+"""Entry points to the face pipeline that import it on first use.
+
+Routes, the metrics endpoint and CLI tools import this module instead of
+au_processes, so importing the app does not load OpenCV and the
+face-analysis stack. The models themselves (TensorFlow, MediaPipe, dlib)
+are loaded by the model registry on first use or by the warmup. The
+functions are module-level, so process pools can still pickle them.
+"""
+
+import sys
+from typing import List
+
+import numpy as np
+
+
+def load():
+    """Import the face pipeline (a no-op after the first call) and return au_processes."""
+    from auth_logic.validation import au_processes
+    return au_processes
+
+
+def is_loaded() -> bool:
+    return "auth_logic.validation.au_processes" in sys.modules
+
+
+def verify_login_images(user_id: str, images: List[bytes]) -> bool:
+    """See au_processes.verify_login_images."""
+    return load().verify_login_images(user_id, images)
+
+
+def register_user_images(user_id: str, images: List[bytes]) -> np.ndarray:
+    """See au_processes.register_user_images."""
+    return load().register_user_images(user_id, images)
+
+
+def embed_probe_images(images: List[bytes]) -> np.ndarray:
+    """See au_processes.embed_probe_images."""
+    return load().embed_probe_images(images)
+
+
+def identify_probe(probe: np.ndarray, top_k: int) -> List[dict]:
+    """See au_processes.identify_probe."""
+    return load().identify_probe(probe, top_k)
+
+
+def stream_verifier(user_id: str):
+    """New StreamVerifier for a user's streamed login."""
+    from auth_logic.validation.stream_process import StreamVerifier
+    return StreamVerifier(user_id)
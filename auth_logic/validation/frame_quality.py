@@ -0,0 +1,72 @@
+# frame_quality.py
+
+import math
+import logging
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from auth_logic.usr_constants.embed_cfg import QUALITY_BLUR_REF, QUALITY_FACE_PX
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger("FrameQuality")
+
+# Side of the square the crop is resized to before measuring blur, so the
+# Laplacian variance does not depend on how large the face is in the frame
+BLUR_SAMPLE_PX = 96
+
+# Relative importance of blur, brightness, face size and pose in the score
+QUALITY_WEIGHTS = np.array([0.35, 0.2, 0.25, 0.2], dtype=np.float32)
+
+
+def face_features(analysis) -> List[float]:
+    """Raw measurements of one analysed face: blur, brightness, size, yaw and roll."""
+    gray = cv2.cvtColor(analysis.crop, cv2.COLOR_BGR2GRAY)
+    sample = cv2.resize(gray, (BLUR_SAMPLE_PX, BLUR_SAMPLE_PX), interpolation=cv2.INTER_AREA)
+    blur = float(cv2.Laplacian(sample, cv2.CV_32F).var())
+    brightness = float(sample.mean())
+    x, _, bw, bh = analysis.box
+    size = float(min(bw, bh))
+
+    eyes = analysis.eye_landmarks
+    if eyes is None:
+        return [blur, brightness, size, math.nan, math.nan]
+    left, right = eyes[:6].mean(axis=0), eyes[6:].mean(axis=0)
+    # Eye midpoint drifting from the box centre is a cheap proxy for yaw
+    yaw = abs((left[0] + right[0]) / 2 - (x + bw / 2)) / bw
+    roll = abs(math.degrees(math.atan2(right[1] - left[1], right[0] - left[0])))
+    return [blur, brightness, size, float(yaw), roll]
+
+
+def score_faces(analyses: List[Optional[object]]) -> np.ndarray:
+    """Quality in [0, 1] per analysed frame; frames without a face score 0."""
+    scores = np.zeros(len(analyses), dtype=np.float32)
+    present = [i for i, analysis in enumerate(analyses) if analysis is not None]
+    if not present:
+        return scores
+
+    blur, brightness, size, yaw, roll = np.array(
+        [face_features(analyses[i]) for i in present], dtype=np.float32
+    ).T
+    blur_s = np.clip(blur / QUALITY_BLUR_REF, 0.0, 1.0)
+    bright_s = np.clip(1.0 - ((brightness - 128.0) / 128.0) ** 2, 0.0, 1.0)
+    size_s = np.clip(size / QUALITY_FACE_PX, 0.0, 1.0)
+    pose_s = np.clip(1.0 - yaw / 0.25, 0.0, 1.0) * np.clip(1.0 - roll / 30.0, 0.0, 1.0)
+    pose_s = np.where(np.isnan(pose_s), 0.5, pose_s)  # No landmarks: neutral pose
+
+    # Weighted geometric mean, so one very poor measurement sinks the frame
+    parts = np.stack([blur_s, bright_s, size_s, pose_s], axis=1)
+    scores[present] = np.exp(np.log(np.maximum(parts, 1e-3)) @ QUALITY_WEIGHTS)
+    return scores
+
+
+def select_top_k(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the best ``top_k`` frames with a face, best first; 0 keeps them all."""
+    order = np.argsort(-scores, kind="stable")
+    order = order[scores[order] > 0]
+    if top_k > 0:
+        order = order[:top_k]
+    log.info(f"Selected {len(order)} of {len(scores)} frames by quality.")
+    return order
@@ -0,0 +1,100 @@
+# model_cascade.py
+
+import sys
+import logging
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+from auth_logic.usr_constants.embed_cfg import FAST_SIM_THRESH, MODEL_CASCADE_BAND
+from auth_logic.usr_constants.serve_cfg import EMBED_MEMO_ENABLED
+from auth_logic.usr_exceptions.error_handler import CustomError
+from auth_logic.inference.embedding_engine import get_fast_engine
+from auth_logic.inference.embed_memo import embed_memo
+from auth_logic.validation.sequential_decision import PENDING, ACCEPT, REJECT
+from auth_logic.validation.template_match import score_probe
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger("ModelCascade")
+
+FAST_ACCEPT, FAST_REJECT, ESCALATED, NO_TEMPLATE = "fast_accept", "fast_reject", "escalated", "no_template"
+
+
+class CascadeStats:
+    """Per-process counters of how model-cascade requests were decided."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counts = {FAST_ACCEPT: 0, FAST_REJECT: 0, ESCALATED: 0, NO_TEMPLATE: 0}
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        total = sum(counts.values())
+        heavy = counts[ESCALATED] + counts[NO_TEMPLATE]
+        return {
+            "requests": total,
+            **counts,
+            "escalation_rate": round(heavy / total, 3) if total else 0.0,
+        }
+
+
+cascade_stats = CascadeStats()
+
+
+class CascadeVerifier:
+    """First tier of the two-model cascade.
+
+    Scores the probe faces with the cheap model against the user's template
+    for that model. A score clearly above or below ``threshold`` decides the
+    request; anything inside ``threshold +/- band`` (or a user enrolled
+    before the fast model existed) returns PENDING so the caller runs the
+    heavy model.
+    """
+
+    def __init__(self, engine=None, threshold: float = FAST_SIM_THRESH, band: float = MODEL_CASCADE_BAND) -> None:
+        self.engine = engine or get_fast_engine()
+        self.threshold = threshold
+        self.band = band
+
+    def decide(
+        self,
+        templates: dict,
+        faces: List[np.ndarray],
+        weights: Optional[np.ndarray] = None,
+        scope: Optional[str] = None,
+    ) -> str:
+        """ACCEPT or REJECT from the fast model alone, or PENDING to escalate."""
+        try:
+            template = templates.get(self.engine.model_id)
+            if template is None:
+                cascade_stats.record(NO_TEMPLATE)
+                return PENDING
+
+            if EMBED_MEMO_ENABLED:
+                embeds = embed_memo.embed(faces, self.engine.embed_batch, self.engine.model_id, scope)
+            else:
+                embeds = self.engine.embed_batch(faces)
+            score = score_probe(template, embeds, weights)
+
+            if score >= self.threshold + self.band:
+                outcome, decision = FAST_ACCEPT, ACCEPT
+            elif score < self.threshold - self.band:
+                outcome, decision = FAST_REJECT, REJECT
+            else:
+                outcome, decision = ESCALATED, PENDING
+            cascade_stats.record(outcome)
+            stats = cascade_stats.stats()
+            log.info(
+                f"Fast tier {outcome} (score={score:.4f}); "
+                f"escalation rate {stats['escalation_rate']:.1%} over {stats['requests']} requests."
+            )
+            return decision
+        except Exception as e:
+            raise CustomError(e, sys) from e
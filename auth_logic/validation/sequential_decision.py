@@ -0,0 +1,78 @@
+# sequential_decision.py
+
+import time
+from typing import Optional
+
+import numpy as np
+
+from auth_logic.usr_constants.embed_cfg import SIM_THRESH
+from auth_logic.usr_log.metrics import stage
+from auth_logic.validation.template_match import score_probe
+
+PENDING, ACCEPT, REJECT = "pending", "accept", "reject"
+
+
+class SequentialDecision:
+    """Running similarity against stored templates with early accept/reject.
+
+    Embeddings are added as they are computed; after each addition every
+    embedding so far is scored against the ``(K, D)`` unit-norm templates and
+    the per-frame scores are combined with their weights (see score_probe).
+    Once ``min_frames`` are in, the decision is an accept when liveness
+    passed and the score clears
+    ``threshold + margin``, a reject when it falls below ``threshold - margin``,
+    and otherwise pending until the caller runs out of frames or time.
+    """
+
+    def __init__(
+        self,
+        templates: np.ndarray,
+        threshold: float = SIM_THRESH,
+        margin: float = 0.0,
+        min_frames: int = 1,
+        budget_ms: Optional[float] = None,
+    ) -> None:
+        self.templates = templates
+        self.threshold = threshold
+        self.margin = margin
+        self.min_frames = min_frames
+        self.budget_ms = budget_ms
+        self.embeds = []
+        self.weights = []
+        self.count = 0
+        self.similarity = None
+        self.started = time.perf_counter()
+
+    def add(self, embeds: np.ndarray, weights: Optional[np.ndarray] = None) -> float:
+        """Add a batch of embeddings and return the similarity over all frames so far."""
+        embeds = np.atleast_2d(np.asarray(embeds, dtype=np.float32))
+        weights = np.ones(len(embeds), dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32)
+        self.embeds.append(embeds)
+        self.weights.append(weights)
+        self.count += len(embeds)
+        with stage("similarity"):
+            self.similarity = score_probe(self.templates, np.concatenate(self.embeds), np.concatenate(self.weights))
+        return self.similarity
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def over_budget(self) -> bool:
+        return self.budget_ms is not None and self.elapsed_ms >= self.budget_ms
+
+    def decide(self, liveness: bool, exhausted: bool = False) -> str:
+        """Early decision on a clear margin; the plain threshold once no more frames will come."""
+        if self.similarity is not None and self.count >= self.min_frames:
+            if liveness and self.similarity >= self.threshold + self.margin:
+                return ACCEPT
+            if self.similarity < self.threshold - self.margin:
+                return REJECT
+        if exhausted or self.over_budget():
+            return self.final(liveness)
+        return PENDING
+
+    def final(self, liveness: bool) -> str:
+        """Decision with whatever evidence has been collected."""
+        passed = liveness and self.similarity is not None and self.similarity >= self.threshold
+        return ACCEPT if passed else REJECT
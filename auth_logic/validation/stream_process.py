@@ -0,0 +1,110 @@
+# stream_process.py
+
+import sys
+import time
+import logging
+
+import numpy as np
+
+from auth_logic.usr_constants.embed_cfg import EMB_MODEL_ID
+from auth_logic.usr_constants.serve_cfg import (
+    STREAM_MAX_FRAMES,
+    STREAM_MIN_FRAMES,
+    STREAM_SIM_MARGIN,
+)
+from auth_logic.usr_exceptions.error_handler import CustomError
+from auth_logic.usr_log.metrics import stage
+from auth_logic.usr_entities.frame_entity import FrameData
+from auth_logic.validation.au_processes import LoginCheck
+from auth_logic.validation.sequential_decision import PENDING, ACCEPT, REJECT, SequentialDecision
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger("StreamVerify")
+
+
+class StreamVerifier:
+    """Verifies a user frame by frame and decides as soon as the evidence allows.
+
+    Each frame goes through liveness (until a blink has been seen) and
+    embedding. After every frame, each embedding so far is scored against
+    the user's ``(K, D)`` template matrix and the per-frame scores are
+    combined with score_probe (no averaged probe). From ``min_frames`` on,
+    the session accepts once liveness passed and the score clears
+    ``SIM_THRESH + margin``, rejects once it falls below ``SIM_THRESH - margin``,
+    and otherwise decides on the plain threshold when the frame budget or
+    time limit runs out.
+    """
+
+    def __init__(
+        self,
+        user_id: str,
+        max_frames: int = STREAM_MAX_FRAMES,
+        min_frames: int = STREAM_MIN_FRAMES,
+        margin: float = STREAM_SIM_MARGIN,
+    ) -> None:
+        self.user_id = user_id
+        self.check = LoginCheck(user_id)
+        self.max_frames = max_frames
+        self.min_frames = min_frames
+        self.margin = margin
+        self.frames_seen = 0
+        self.blink_seen = False
+        self.ears = []
+        self.decision = None
+        if self.check.check_valid():
+            self.decision = SequentialDecision(
+                self.check.user_data["templates"][EMB_MODEL_ID], margin=margin, min_frames=min_frames
+            )
+        self.started = time.perf_counter()
+
+    @property
+    def similarity(self):
+        return None if self.decision is None else self.decision.similarity
+
+    def _result(self, decision: str) -> dict:
+        return {
+            "decision": decision,
+            "frames": self.frames_seen,
+            "liveness": self.blink_seen,
+            "similarity": None if self.similarity is None else round(float(self.similarity), 4),
+            "elapsed_ms": round((time.perf_counter() - self.started) * 1000, 1),
+        }
+
+    def add_frame(self, data: bytes) -> dict:
+        """Process one encoded frame and return the current decision."""
+        try:
+            if self.decision is None:
+                return self._result(REJECT)
+
+            with stage("decode"):
+                frame = FrameData.from_bytes(data)
+            self.frames_seen += 1
+            if not self.blink_seen:
+                # EAR per frame; the blink pattern is checked over the sequence so far
+                self.ears.append(self.check.liveness.ears([frame])[0])
+                self.blink_seen = self.check.liveness.check_ears(np.array(self.ears))
+
+            face = LoginCheck.get_face(frame)
+            if face is not None:
+                self.decision.add(LoginCheck.embed_faces([face], self.user_id))
+
+            decision = self.decide()
+            if decision != PENDING:
+                log.info(
+                    f"Stream for user {self.user_id} decided '{decision}' after "
+                    f"{self.frames_seen} frames (sim={self.similarity})."
+                )
+            return self._result(decision)
+        except Exception as e:
+            raise CustomError(e, sys) from e
+
+    def decide(self) -> str:
+        """Early accept/reject on a clear margin, otherwise wait for the frame budget."""
+        return self.decision.decide(self.blink_seen, exhausted=self.frames_seen >= self.max_frames)
+
+    def finish(self) -> dict:
+        """Final decision when the frame budget or time limit is exhausted."""
+        if self.decision is None:
+            return self._result(REJECT)
+        return self._result(self.decision.final(self.blink_seen))
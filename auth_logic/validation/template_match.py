@@ -0,0 +1,78 @@
+# template_match.py
+
+from typing import Optional
+
+import numpy as np
+
+from auth_logic.usr_constants.embed_cfg import (
+    PROBE_SCORE,
+    PROBE_SCORE_TOP_K,
+    TEMPLATE_KMEANS_K,
+    TEMPLATE_MODE,
+    TEMPLATE_SCORE,
+    TEMPLATE_SCORE_TOP_K,
+)
+from auth_logic.inference.gallery_index import normalize_rows, spherical_kmeans
+
+
+def enrollment_templates(embeds: np.ndarray, mode: str = TEMPLATE_MODE, n_clusters: int = TEMPLATE_KMEANS_K) -> np.ndarray:
+    """Templates to store for a user: every frame embedding, or k-means centroids of them."""
+    embeds = normalize_rows(np.atleast_2d(embeds))
+    if mode == "kmeans" and len(embeds) > n_clusters:
+        return spherical_kmeans(embeds, n_clusters)
+    return embeds
+
+
+def aggregate_scores(scores: np.ndarray, mode: str = TEMPLATE_SCORE, top_k: int = TEMPLATE_SCORE_TOP_K) -> np.ndarray:
+    """Reduce the last axis of template similarities with max, mean or mean of the top k."""
+    if mode == "max":
+        return scores.max(axis=-1)
+    if mode == "mean":
+        return scores.mean(axis=-1)
+    if mode == "topk":
+        k = min(top_k, scores.shape[-1])
+        return np.partition(scores, -k, axis=-1)[..., -k:].mean(axis=-1)
+    raise ValueError(f"Unknown template score mode: {mode}")
+
+
+def score_probes(templates: np.ndarray, probes: np.ndarray, mode: str = TEMPLATE_SCORE, top_k: int = TEMPLATE_SCORE_TOP_K) -> np.ndarray:
+    """Per-probe scores: a probe batch ``(N, D)`` against unit templates ``(K, D)`` in one matrix multiply."""
+    return aggregate_scores(normalize_rows(np.atleast_2d(probes)) @ templates.T, mode, top_k)
+
+
+def aggregate_probes(
+    scores: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    mode: str = PROBE_SCORE,
+    top_k: int = PROBE_SCORE_TOP_K,
+) -> float:
+    """Reduce per-probe scores to one: quality-weighted mean, max, or weighted mean of the top k."""
+    weights = np.ones(len(scores), dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32)
+    if mode == "max":
+        return float(scores.max())
+    if mode == "topk":
+        keep = np.argsort(scores)[-min(top_k, len(scores)):]
+        scores, weights = scores[keep], weights[keep]
+    elif mode != "mean":
+        raise ValueError(f"Unknown probe score mode: {mode}")
+    total = float(weights.sum())
+    return float(weights @ scores / total) if total > 0 else float(scores.mean())
+
+
+def score_probe(
+    templates: np.ndarray,
+    probes: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    mode: str = TEMPLATE_SCORE,
+    top_k: int = TEMPLATE_SCORE_TOP_K,
+    probe_mode: str = PROBE_SCORE,
+    probe_top_k: int = PROBE_SCORE_TOP_K,
+) -> float:
+    """One score for a request: every probe frame against every template, aggregated over both axes.
+
+    Each probe is first scored against its templates (``mode``), so every
+    frame can match its nearest template; the per-frame scores are then
+    combined with the probes' quality ``weights`` (``probe_mode``).
+    """
+    scores = score_probes(templates, probes, mode, top_k)
+    return aggregate_probes(scores, weights, probe_mode, probe_top_k)
@@ -9,6 +9,7 @@ from auth_logic.connect_data.usr_db_ops import UserDatabaseOperations
 from auth_logic.usr_entities.usr_data_entity import UserData  
 from auth_logic.usr_exceptions.error_handler import CustomError
 from auth_logic.usr_log.setup_logg import logger  
+from auth_logic.usr_log.metrics import stage
 
 bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -87,7 +88,8 @@ class ValidateUserLogin:
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Check if the plain password matches the stored hashed password."""
-        return bcrypt_context.verify(plain_password, hashed_password)
+        with stage("bcrypt"):
+            return bcrypt_context.verify(plain_password, hashed_password)
 
     def authenticate_user(self) -> Optional[str]:
         """Authenticate the user based on email and password."""
@@ -158,7 +160,8 @@ class ValidateUserRegistration:
     def save_user(self):
         """Save user details after successful validation."""
         try:
-            secured_password = bcrypt_context.hash(self.user.password_main) 
+            with stage("bcrypt"):
+                secured_password = bcrypt_context.hash(self.user.password_main)
             user_record = {
                 "Name": self.user.full_name,
                 "username": self.user.user_handle,
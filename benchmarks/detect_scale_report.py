@@ -0,0 +1,99 @@
+# detect_scale_report.py
+"""Accuracy versus latency of face detection at different detection resolutions.
+
+Usage:
+    python -m benchmarks.detect_scale_report SAMPLE_DIR [--sides 0 1280 960 640 480 320] [--repeat 5]
+
+Every image in SAMPLE_DIR is analysed at full resolution as the reference,
+then again with the detector input capped at each ``--sides`` value
+(0 = full resolution). The report shows the median analysis time, how often
+a face was still found, the IoU of the box against the reference and the
+mean eye-landmark drift in source pixels. Pick the smallest side whose
+recall and IoU stay where the reference is, and set DETECT_MAX_SIDE to it.
+"""
+
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from auth_logic.usr_entities.frame_entity import FrameData
+from auth_logic.validation.face_analysis import FaceAnalyzer
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+
+
+def load_samples(sample_dir: str) -> list:
+    images = []
+    for path in sorted(Path(sample_dir).iterdir()):
+        if path.suffix.lower() in IMAGE_SUFFIXES:
+            image = cv2.imread(str(path), cv2.IMREAD_COLOR)
+            if image is not None:
+                images.append((path.name, image))
+    return images
+
+
+def box_iou(a: tuple, b: tuple) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = max(min(ax + aw, bx + bw) - max(ax, bx), 0)
+    ih = max(min(ay + ah, by + bh) - max(ay, by), 0)
+    inter = iw * ih
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def analyse(analyzer: FaceAnalyzer, image: np.ndarray, repeat: int) -> tuple:
+    """Median wall time over fresh frames (no cached analysis) and the last result."""
+    timings, result = [], None
+    for _ in range(repeat):
+        frame = FrameData(image)
+        start = time.perf_counter()
+        result = analyzer.analyze(frame)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sample_dir")
+    parser.add_argument("--sides", type=int, nargs="+", default=[0, 1280, 960, 640, 480, 320])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    samples = load_samples(args.sample_dir)
+    if not samples:
+        raise SystemExit(f"No images found in {args.sample_dir}")
+
+    reference = FaceAnalyzer(detect_max_side=0)
+    baseline = {name: analyse(reference, image, 1)[1] for name, image in samples}
+    found = sum(result is not None for result in baseline.values())
+    print(f"{len(samples)} samples, {found} with a face at full resolution")
+    print(f"{'side':>6s} {'median ms':>10s} {'recall':>7s} {'box IoU':>8s} {'eye px':>7s}")
+
+    for side in args.sides:
+        analyzer = FaceAnalyzer(detect_max_side=side)
+        times, hits, ious, drifts = [], 0, [], []
+        for name, image in samples:
+            elapsed, result = analyse(analyzer, image, args.repeat)
+            times.append(elapsed)
+            ref = baseline[name]
+            if ref is None or result is None:
+                continue
+            hits += 1
+            ious.append(box_iou(ref.box, result.box))
+            if ref.eye_landmarks is not None and result.eye_landmarks is not None:
+                drifts.append(float(np.linalg.norm(ref.eye_landmarks - result.eye_landmarks, axis=1).mean()))
+        print(
+            f"{side or 'full':>6} {statistics.median(times):10.2f} "
+            f"{hits / found if found else 0.0:7.2%} "
+            f"{statistics.mean(ious) if ious else 0.0:8.3f} "
+            f"{statistics.mean(drifts) if drifts else float('nan'):7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# landmark_backends.py
+"""Memory and latency of the eye-landmark backends.
+
+Usage:
+    python -m benchmarks.landmark_backends [SAMPLE_DIR] [--backends dlib mediapipe] [--repeat 20]
+
+Each backend runs in its own interpreter so the resident memory of one model
+does not hide the other. Faces are located once with the shared MediaPipe
+detector; without SAMPLE_DIR a synthetic 1280x720 frame with a centred box is
+used, which measures latency only. The report shows model load time, RSS
+added by the backend's models, median and p95 time per face, and how often
+the backend returned landmarks.
+"""
+
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+import numpy as np
+
+from benchmarks.detect_scale_report import load_samples
+
+
+def run_backend(name: str, sample_dir, repeat: int) -> dict:
+    from auth_logic.inference.model_registry import model_registry, current_rss_mb
+    from auth_logic.usr_entities.frame_entity import FrameData
+    from auth_logic.validation.face_analysis import FaceAnalyzer
+    from liveness_detection.landmark_backends import get_landmark_backend
+
+    backend = get_landmark_backend(name)
+    if sample_dir:
+        detector = FaceAnalyzer(landmarks=backend)
+        faces = []
+        for _, image in load_samples(sample_dir):
+            detected = detector.detect(FrameData(image))
+            if detected is not None:
+                faces.append((image, detected[0]))
+    else:
+        image = np.random.default_rng(0).integers(0, 255, size=(720, 1280, 3), dtype=np.uint8)
+        faces = [(image, (490, 210, 300, 300))]
+
+    rss_before = current_rss_mb()
+    report = model_registry.warmup(backend.models)
+    rss_delta = current_rss_mb() - rss_before
+
+    timings, found = [], 0
+    for image, box in faces:
+        for _ in range(repeat):
+            frame = FrameData(image)  # Fresh frame: no cached gray/RGB conversions
+            start = time.perf_counter()
+            points = backend.eye_landmarks(frame, box)
+            timings.append((time.perf_counter() - start) * 1000)
+        found += points is not None
+    timings.sort()
+    return {
+        "backend": name,
+        "faces": len(faces),
+        "found": found,
+        "load_ms": round(sum(report[model]["load_ms"] for model in backend.models), 1),
+        "rss_mb": round(rss_delta, 1),
+        "median_ms": round(statistics.median(timings), 2) if timings else None,
+        "p95_ms": round(timings[int(0.95 * (len(timings) - 1))], 2) if timings else None,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sample_dir", nargs="?")
+    parser.add_argument("--backends", nargs="+", default=["dlib", "mediapipe"])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--single", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.single:
+        print(json.dumps(run_backend(args.single, args.sample_dir, args.repeat)))
+        return
+
+    print(f"{'backend':>10s} {'load ms':>8s} {'RSS MB':>7s} {'median ms':>10s} {'p95 ms':>7s} {'found':>9s}")
+    for name in args.backends:
+        command = [sys.executable, "-m", "benchmarks.landmark_backends", "--single", name, "--repeat", str(args.repeat)]
+        if args.sample_dir:
+            command.append(args.sample_dir)
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        row = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{row['backend']:>10s} {row['load_ms']:8.1f} {row['rss_mb']:7.1f} "
+            f"{row['median_ms']:10.2f} {row['p95_ms']:7.2f} {row['found']:>4d}/{row['faces']:<4d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+# load_test.py
+"""In-process HTTP load test of the real app at rising concurrency levels.
+
+Usage:
+    python -m benchmarks.load_test [--levels 1 2 4 8 16] [--flows 20] [--frames 6] [--model-ms 30]
+                                   [--real-models --samples DIR] [--output FILE]
+
+The app from ``main_entry.build_app`` is served through httpx's ASGI
+transport, so every request goes through the middleware, routes, session
+and JWT cookies, and worker pools exactly as in production. MongoDB is the
+in-process store (DB_URL_NEW=memory://). Each virtual user runs the flow
+register -> enroll face -> password login (password-scope token) -> face
+verification (upgrades it to the full-access token) -> app page, which
+only opens with the full-access token.
+
+By default the models are stubs: a detector that reports a centred face,
+eye landmarks that read the eye state from a marker in the frame (so the
+login frames contain a blink), and an embedding model that projects the
+pixels and sleeps ``--model-ms`` per batch to stand in for inference. The
+numbers then show what the server around the models costs: event-loop
+lag, executor queueing, cookies, bcrypt and the store. ``--real-models``
+uses the configured models on the frames in ``--samples`` instead.
+
+For each level the report lists flows and requests per second, latency
+percentiles per step and the event-loop lag, and names the level after
+which throughput stops growing.
+"""
+
+import os
+import sys
+import time
+import json
+import asyncio
+import secrets
+import argparse
+import tempfile
+import functools
+from types import SimpleNamespace
+from collections import Counter
+
+import cv2
+import numpy as np
+
+# Routes resolve their template directories from the working directory at import time
+TEMPLATE_NAMES = {
+    "viewpages": ("login.html",),
+    "templates": (
+        "embedded_login.html",
+        "embedded_registration.html",
+        "error_screen.html",
+        "login_screen.html",
+        "unauthorized_access.html",
+    ),
+}
+PASSWORD = "Load#Test42"
+MARKER = 16  # Side of the top-left block that tells the stub landmarks whether the eyes are closed
+STEPS = ("register", "enroll", "login", "verify", "home")
+EXPECTED_STATUS = {"register": 302, "enroll": 200, "login": 200, "verify": 200, "home": 200}
+
+
+def prepare_environment(workdir: str) -> None:
+    """Point the app at the in-memory store and a scratch working directory with minimal templates."""
+    os.environ.setdefault("DB_URL_NEW", "memory://loadtest")
+    os.environ.setdefault("DB_NAME_NEW", "loadtest")
+    os.environ.setdefault("USR_COL_NEW", "users")
+    os.environ.setdefault("EMBED_COL_NEW", "embeddings")
+    os.environ.setdefault("SEC_KEY_NEW", secrets.token_hex(32))
+    os.environ.setdefault("ALGO_TYPE", "HS256")
+    # Stubs are installed in this process, so verification must not move to worker processes
+    os.environ.setdefault("VERIFY_EXECUTOR_KIND", "thread")
+    # Every flow sends the same faces twice; keep the model on the request path
+    os.environ.setdefault("EMBED_MEMO_ENABLED", "false")
+    for directory, names in TEMPLATE_NAMES.items():
+        os.makedirs(os.path.join(workdir, directory), exist_ok=True)
+        for name in names:
+            with open(os.path.join(workdir, directory, name), "w") as out:
+                out.write("<p>{{ msg }}</p>\n")
+    os.chdir(workdir)
+
+
+class StubDetector:
+    """MediaPipe-shaped detector result: one face in the centre of every frame."""
+
+    def process(self, rgb):
+        box = SimpleNamespace(xmin=0.25, ymin=0.2, width=0.5, height=0.6)
+        detection = SimpleNamespace(location_data=SimpleNamespace(relative_bounding_box=box), score=[0.99])
+        return SimpleNamespace(detections=[detection])
+
+
+class StubEmbeddingModel:
+    """Keras-shaped model: a fixed random projection of the downscaled crop plus a simulated delay."""
+
+    input_shape = (None, 160, 160, 3)
+
+    def __init__(self, delay_s: float, dims: int = 128) -> None:
+        self.delay_s = delay_s
+        self.projection = np.random.default_rng(0).standard_normal((32 * 32, dims)).astype(np.float32)
+
+    def predict_on_batch(self, batch: np.ndarray) -> np.ndarray:
+        small = np.stack([cv2.resize(face.mean(axis=2), (32, 32), interpolation=cv2.INTER_AREA) for face in batch])
+        flat = small.reshape(len(batch), -1)
+        time.sleep(self.delay_s)
+        return (flat - flat.mean(axis=1, keepdims=True)) @ self.projection
+
+
+def stub_landmark_backend():
+    from liveness_detection.landmark_backends import LandmarkBackend
+
+    class StubLandmarkBackend(LandmarkBackend):
+        """Level eyes whose opening follows the frame's marker block: dark means closed."""
+
+        name = "stub"
+        models = ()
+
+        def eye_landmarks(self, frame, box):
+            x, y, bw, bh = box
+            width = 0.2 * bw
+            opening = width * (0.1 if frame.bgr[:MARKER, :MARKER].mean() < 128 else 0.3)
+            points = []
+            for cx in (x + 0.3 * bw, x + 0.7 * bw):
+                cy = y + 0.4 * bh
+                # dlib eye order p1..p6, so EAR = opening / width
+                points += [
+                    (cx - width / 2, cy), (cx - width / 6, cy - opening / 2), (cx + width / 6, cy - opening / 2),
+                    (cx + width / 2, cy), (cx + width / 6, cy + opening / 2), (cx - width / 6, cy + opening / 2),
+                ]
+            return np.array(points, dtype=np.float32)
+
+    return StubLandmarkBackend()
+
+
+def install_stub_models(model_ms: float) -> None:
+    from auth_logic.inference.model_registry import model_registry
+    from auth_logic.validation.face_analysis import face_analyzer
+
+    model_registry.register("face_detector", StubDetector)
+    model_registry.register("embedding_model", functools.partial(StubEmbeddingModel, model_ms / 1000))
+    face_analyzer.landmarks = stub_landmark_backend()
+
+
+def synthetic_faces(seed: int, frames: int, width: int = 640, height: int = 480) -> tuple:
+    """JPEG enrollment frames (eyes open) and a login sequence with one blink for one user."""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 255, size=(height // 32, width // 32, 3), dtype=np.uint8)
+    base = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+
+    def encode(closed: bool) -> bytes:
+        image = base.copy()
+        image[:MARKER, :MARKER] = 0 if closed else 255
+        return cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+    opened, closed = encode(False), encode(True)
+    sequence = [opened] * frames
+    if frames >= 3:
+        sequence[frames // 2] = closed
+    return [opened] * frames, sequence
+
+
+def sample_faces(sample_dir: str, frames: int) -> tuple:
+    from benchmarks.detect_scale_report import load_samples
+
+    images = [cv2.imencode(".jpg", image)[1].tobytes() for _, image in load_samples(sample_dir)][:frames]
+    if not images:
+        raise SystemExit(f"No images found in {sample_dir}")
+    return images, images
+
+
+def image_files(frames: list) -> dict:
+    return {f"img_{i + 1}": (f"img_{i + 1}.jpg", frame, "image/jpeg") for i, frame in enumerate(frames)}
+
+
+async def run_flow(client, user: int, enroll: list, login: list, timings: dict, statuses: dict) -> bool:
+    """One virtual user's register -> enroll -> login -> verify -> home; False at the first unexpected status."""
+    email = f"load{user}@example.com"
+    steps = (
+        ("register", "POST", "/userauth/process_reg", {"data": {
+            "name": f"Load User {user}", "username": f"load{user}", "email": email,
+            "phone": "0000000000", "password": PASSWORD, "password2": PASSWORD,
+        }}),
+        ("enroll", "POST", "/app_routes/register_embed", {"files": image_files(enroll)}),
+        ("login", "POST", "/userauth/token_auth", {"data": {"email": email, "password": PASSWORD}}),
+        ("verify", "POST", "/app_routes/", {"files": image_files(login)}),
+        # Only opens if the face check upgraded the cookie to the full-access token
+        ("home", "GET", "/app_routes/", {}),
+    )
+    for step, method, url, payload in steps:
+        start = time.perf_counter()
+        response = await client.request(method, url, **payload)
+        timings[step].append((time.perf_counter() - start) * 1000)
+        statuses[step][response.status_code] += 1
+        if response.status_code != EXPECTED_STATUS[step]:
+            return False
+    return True
+
+
+async def measure_loop_lag(interval: float, lags: list, stop: asyncio.Event) -> None:
+    """Record how late the event loop wakes a sleeper; lag means something blocked the loop."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(max(loop.time() - start - interval, 0.0) * 1000)
+
+
+async def run_level(app, concurrency: int, flows: int, first_user: int, frames_for, lag_interval: float) -> dict:
+    import httpx
+    from benchmarks.pipeline_bench import summarize
+
+    timings = {step: [] for step in STEPS}
+    statuses = {step: Counter() for step in STEPS}
+    lags = []
+    stop = asyncio.Event()
+    remaining = iter(range(first_user, first_user + flows))
+    completed = Counter()
+
+    async def virtual_user():
+        # One client per virtual user keeps its session and JWT cookies apart
+        for user in remaining:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest") as client:
+                enroll, login = frames_for(user)
+                completed[await run_flow(client, user, enroll, login, timings, statuses)] += 1
+
+    monitor = asyncio.create_task(measure_loop_lag(lag_interval, lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(virtual_user() for _ in range(concurrency)))
+    duration = time.perf_counter() - start
+    stop.set()
+    await monitor
+
+    requests = sum(len(values) for values in timings.values())
+    lag = np.asarray(lags or [0.0])
+    return {
+        "concurrency": concurrency,
+        "flows": flows,
+        "succeeded": completed[True],
+        "failed": completed[False],
+        "duration_s": round(duration, 3),
+        "flows_per_s": round(completed[True] / duration, 3),
+        "requests_per_s": round(requests / duration, 3),
+        "steps": {
+            step: {**summarize(values), "status": {str(code): n for code, n in statuses[step].items()}}
+            for step, values in timings.items() if values
+        },
+        "loop_lag_ms": {
+            "p50": round(float(np.percentile(lag, 50)), 3),
+            "p99": round(float(np.percentile(lag, 99)), 3),
+            "max": round(float(lag.max()), 3),
+        },
+    }
+
+
+def saturation_level(levels: list, min_gain: float = 0.05):
+    """Concurrency after which flows/s grew by less than ``min_gain``, or None if it kept growing."""
+    for previous, current in zip(levels, levels[1:]):
+        if current["flows_per_s"] < previous["flows_per_s"] * (1 + min_gain):
+            return previous["concurrency"]
+    return None
+
+
+async def run_levels(args, frames_for) -> list:
+    from main_entry import build_app
+    from utility.worker_pool import shutdown_worker_pool
+
+    app = build_app(warmup_models=False)
+    results, first_user = [], 0
+    try:
+        for concurrency in args.levels:
+            flows = max(args.flows, concurrency)
+            result = await run_level(app, concurrency, flows, first_user, frames_for, args.lag_interval_ms / 1000)
+            first_user += flows
+            results.append(result)
+            steps = " ".join(f"{step}={values['p95_ms']:.0f}" for step, values in result["steps"].items())
+            print(
+                f"c={concurrency:<4d} flows/s={result['flows_per_s']:7.2f} req/s={result['requests_per_s']:7.2f} "
+                f"failed={result['failed']:<3d} p95 ms: {steps}  loop lag p99={result['loop_lag_ms']['p99']:.1f} ms "
+                f"max={result['loop_lag_ms']['max']:.1f} ms",
+                flush=True,
+            )
+    finally:
+        shutdown_worker_pool()
+    return results
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--flows", type=int, default=20, help="Flows per level (at least one per virtual user).")
+    parser.add_argument("--frames", type=int, default=6, help="Frames per upload, 3 to 8 (the login sequence needs a blink).")
+    parser.add_argument("--model-ms", type=float, default=30.0, help="Simulated inference time per stub embedding batch.")
+    parser.add_argument("--real-models", action="store_true", help="Use the configured models instead of stubs.")
+    parser.add_argument("--samples", help="Directory of face images sent by every user (required with --real-models).")
+    parser.add_argument("--lag-interval-ms", type=float, default=10.0)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args(argv)
+    if args.real_models and not args.samples:
+        parser.error("--real-models needs --samples")
+    args.frames = min(max(args.frames, 3), 8)
+
+    output = os.path.abspath(args.output) if args.output else None
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as workdir:
+        cwd = os.getcwd()
+        prepare_environment(workdir)
+        try:
+            if args.real_models:
+                frames = sample_faces(os.path.join(cwd, args.samples), args.frames)
+
+                def frames_for(user):
+                    return frames
+            else:
+                install_stub_models(args.model_ms)
+
+                def frames_for(user):
+                    return synthetic_faces(user, args.frames)
+            levels = asyncio.run(run_levels(args, frames_for))
+        finally:
+            os.chdir(cwd)
+
+    saturated = saturation_level(levels)
+    if saturated is None:
+        print("Throughput still grew at the highest level; try higher --levels.")
+    else:
+        print(f"Throughput stops growing beyond concurrency {saturated}.")
+    if output:
+        report = {
+            "models": "real" if args.real_models else f"stub ({args.model_ms:g} ms per batch)",
+            "frames": args.frames,
+            "saturation_concurrency": saturated,
+            "levels": levels,
+        }
+        with open(output, "w") as out:
+            json.dump(report, out, indent=2)
+        print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+# pipeline_bench.py
+"""Per-stage and end-to-end latency of the verification pipeline, saved as JSON.
+
+Usage:
+    python -m benchmarks.pipeline_bench run [--samples DIR] [--frames 8] [--repeat 50] [--output FILE]
+    python -m benchmarks.pipeline_bench compare BASELINE.json CANDIDATE.json [--threshold 0.1] [--metric p95_ms]
+
+``run`` times each stage on synthetic frames, or on the images in
+``--samples`` when given (synthetic frames contain no face, so the face
+stages and end-to-end verification need real samples). MongoDB is replaced
+by the in-process store (DB_URL_NEW=memory://) and the embedding memo is
+off so repeated frames still reach the model. Stages whose models or
+dependencies are unavailable are recorded as skipped with the reason.
+
+``compare`` prints the change of one percentile per stage and exits with
+status 1 when any stage got slower than ``--threshold`` (0.1 = 10 %) or
+end-to-end throughput dropped by more than it.
+"""
+
+import os
+
+# Before the pipeline imports: settings are read from the environment at import time
+os.environ.setdefault("DB_URL_NEW", "memory://benchmark")
+os.environ.setdefault("EMBED_MEMO_ENABLED", "false")
+
+import sys
+import json
+import time
+import base64
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from auth_logic.usr_log.setup_logg import LOG_DIRECTORY
+from auth_logic.usr_log.metrics import finish_request, start_request
+from auth_logic.usr_entities.frame_entity import FrameData
+from auth_logic.usr_constants import embed_cfg, serve_cfg
+from benchmarks.upload_paths import synthetic_jpegs
+from benchmarks.detect_scale_report import load_samples
+from phases.app_phase.user_application import convert_image_data
+
+RESULTS_DIRECTORY = os.path.join(LOG_DIRECTORY, "benchmarks")
+PERCENTILES = (50, 95, 99)
+RECORDED_SETTINGS = (
+    (embed_cfg, "EMB_MODEL"),
+    (embed_cfg, "EMBED_ENGINE"),
+    (embed_cfg, "LANDMARK_BACKEND"),
+    (embed_cfg, "MODEL_CASCADE_ENABLED"),
+    (embed_cfg, "DETECT_MAX_SIDE"),
+    (embed_cfg, "QUALITY_TOP_K"),
+    (embed_cfg, "ALIGN_FACES"),
+    (serve_cfg, "BATCH_SCHEDULER_ENABLED"),
+    (serve_cfg, "CASCADE_ENABLED"),
+    (serve_cfg, "EMBED_MEMO_ENABLED"),
+)
+
+
+def summarize(timings_ms: list) -> dict:
+    values = np.asarray(timings_ms, dtype=np.float64)
+    summary = {"n": int(values.size), "mean_ms": round(float(values.mean()), 3)}
+    for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f"p{q}_ms"] = round(float(value), 3)
+    summary["min_ms"] = round(float(values.min()), 3)
+    summary["max_ms"] = round(float(values.max()), 3)
+    return summary
+
+
+def measure(func, inputs: list, repeat: int, warmup: int) -> dict:
+    """Time ``func`` over ``inputs`` round-robin; the first call also loads any models."""
+    try:
+        for i in range(warmup):
+            func(inputs[i % len(inputs)])
+    except Exception as e:
+        return {"skipped": f"{type(e).__name__}: {e}"}
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(inputs[i % len(inputs)])
+        timings.append((time.perf_counter() - start) * 1000)
+    return summarize(timings)
+
+
+def center_crop(image: np.ndarray, side: int = 160) -> np.ndarray:
+    h, w = image.shape[:2]
+    s = min(h, w)
+    y, x = (h - s) // 2, (w - s) // 2
+    return cv2.resize(image[y:y + s, x:x + s], (side, side), interpolation=cv2.INTER_AREA)
+
+
+def stage_benchmarks(jpegs: list, images: list, repeat: int, warmup: int) -> dict:
+    """Each stage on its own, with fresh FrameData so no cached analysis is reused."""
+    # Imported here so a missing model dependency only skips the stages that need it
+    from auth_logic.validation.au_processes import LoginCheck
+    from auth_logic.validation.validation_process import bcrypt_context
+    from liveness_detection.blink_detection import BlinkDetector
+
+    data_uris = ["data:image/jpeg;base64," + base64.b64encode(jpeg).decode() for jpeg in jpegs]
+    results = {
+        "convert_image_data": measure(convert_image_data, data_uris, repeat, warmup),
+        "decode": measure(FrameData.from_bytes, jpegs, repeat, warmup),
+        "get_face": measure(lambda image: LoginCheck.get_face(FrameData(image)), images, repeat, warmup),
+    }
+    blinks = BlinkDetector()
+    results["detect_blinks"] = measure(lambda image: blinks.detect_blinks(FrameData(image)), images, repeat, warmup)
+
+    def make_embed(image):
+        # Frames without a face still measure the model on a centre crop
+        if LoginCheck.get_face(FrameData(image)) is not None:
+            return LoginCheck.make_embed(FrameData(image))
+        return LoginCheck.embed_faces([center_crop(image)])[0]
+
+    results["make_embed"] = measure(make_embed, images, repeat, warmup)
+
+    rng = np.random.default_rng(0)
+    stored = rng.standard_normal(128).astype(np.float32)
+    batches = [rng.standard_normal((len(images), 128)).astype(np.float32) for _ in range(8)]
+    results["avg_embeds_calc_sim"] = measure(
+        lambda embeds: LoginCheck.calc_sim(stored, LoginCheck.avg_embeds(embeds)), batches, repeat, warmup
+    )
+
+    hashed = bcrypt_context.hash("Bench#Pass1")
+    # bcrypt is deliberately slow; a tenth of the repeats is plenty
+    results["bcrypt"] = measure(
+        lambda password: bcrypt_context.verify(password, hashed), ["Bench#Pass1"], max(repeat // 10, 3), 1
+    )
+    return results
+
+
+def end_to_end_benchmark(jpegs: list, requests: int, concurrency: int) -> dict:
+    """Enroll one user in the in-memory store, then time concurrent full verifications.
+
+    Each verification's outcome is counted as accept, reject (scored by a
+    model) or liveness_reject (stopped before face selection and embedding).
+    Any liveness reject marks the run ``invalid``: its latency would only
+    cover a truncated pipeline, so ``compare`` ignores it.
+    """
+    from auth_logic.validation.au_processes import register_user_images, verify_login_images
+
+    user_id = "benchmark-user"
+    try:
+        register_user_images(user_id, jpegs)
+        verify_login_images(user_id, jpegs)
+    except Exception as e:
+        return {"skipped": f"{type(e).__name__}: {e}"}
+
+    def timed(_):
+        token = start_request()
+        start = time.perf_counter()
+        accepted = verify_login_images(user_id, jpegs)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        # Face selection ("quality") only runs once liveness has passed
+        reached = "quality" in finish_request(token)
+        return elapsed_ms, "accept" if accepted else "reject" if reached else "liveness_reject"
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(requests)))
+    wall = time.perf_counter() - start
+    summary = summarize([elapsed_ms for elapsed_ms, _ in results])
+    summary["concurrency"] = concurrency
+    summary["throughput_per_s"] = round(requests / wall, 3)
+    outcomes = Counter(outcome for _, outcome in results)
+    summary["outcomes"] = {outcome: outcomes[outcome] for outcome in ("accept", "reject", "liveness_reject")}
+    if outcomes["liveness_reject"]:
+        summary["invalid"] = (
+            f"{outcomes['liveness_reject']}/{requests} verifications stopped at liveness before embedding "
+            f"(the frames need a blink)"
+        )
+    return summary
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> dict:
+    if args.samples:
+        images = [image for _, image in load_samples(args.samples)][:args.frames]
+        if not images:
+            raise SystemExit(f"No images found in {args.samples}")
+        jpegs = [cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes() for image in images]
+    else:
+        jpegs = synthetic_jpegs(args.frames, args.width, args.height)
+        images = [FrameData.from_bytes(jpeg).bgr for jpeg in jpegs]
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "input": args.samples or f"synthetic {args.width}x{args.height}",
+            "frames": len(jpegs),
+            "repeat": args.repeat,
+            "settings": {name: getattr(module, name, None) for module, name in RECORDED_SETTINGS},
+        },
+        "stages": stage_benchmarks(jpegs, images, args.repeat, args.warmup),
+        "end_to_end": end_to_end_benchmark(jpegs, args.requests, args.concurrency),
+    }
+
+    output = args.output or os.path.join(RESULTS_DIRECTORY, f"pipeline_{datetime.now().strftime('%Y%m%d%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as out:
+        json.dump(report, out, indent=2)
+
+    print(f"{'stage':22s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}")
+    for name, result in {**report["stages"], "end_to_end": report["end_to_end"]}.items():
+        if "skipped" in result:
+            print(f"{name:22s} skipped ({result['skipped']})")
+        else:
+            print(f"{name:22s} {result['p50_ms']:9.2f} {result['p95_ms']:9.2f} {result['p99_ms']:9.2f}")
+    if "throughput_per_s" in report["end_to_end"]:
+        print(f"end-to-end throughput: {report['end_to_end']['throughput_per_s']:.2f} verifications/s")
+        print(f"end-to-end outcomes: {report['end_to_end']['outcomes']}")
+    if "invalid" in report["end_to_end"]:
+        print(f"WARNING: end-to-end run invalid: {report['end_to_end']['invalid']}")
+    print(f"Results written to {output}")
+    return report
+
+
+def compare_reports(baseline: dict, candidate: dict, metric: str = "p95_ms", threshold: float = 0.1) -> list:
+    """Rows of ``(stage, base, new, change, regressed)``; change is relative, None when not comparable."""
+    rows = []
+    # An invalid end-to-end run measured a truncated pipeline and is not comparable
+    base_e2e = {} if "invalid" in baseline["end_to_end"] else baseline["end_to_end"]
+    new_e2e = {} if "invalid" in candidate["end_to_end"] else candidate["end_to_end"]
+    base_stages = {**baseline["stages"], "end_to_end": base_e2e}
+    new_stages = {**candidate["stages"], "end_to_end": new_e2e}
+    for name in base_stages.keys() | new_stages.keys():
+        base, new = base_stages.get(name, {}).get(metric), new_stages.get(name, {}).get(metric)
+        if base is None or new is None or base <= 0:
+            rows.append((name, base, new, None, False))
+            continue
+        change = new / base - 1
+        rows.append((name, base, new, change, change > threshold))
+
+    base_tp = base_e2e.get("throughput_per_s")
+    new_tp = new_e2e.get("throughput_per_s")
+    if base_tp and new_tp:
+        change = new_tp / base_tp - 1
+        rows.append(("end_to_end throughput/s", base_tp, new_tp, change, change < -threshold))
+    return sorted(rows, key=lambda row: row[0])
+
+
+def compare(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    rows = compare_reports(baseline, candidate, args.metric, args.threshold)
+    print(f"{args.metric} {baseline['meta'].get('commit')} -> {candidate['meta'].get('commit')}, threshold {args.threshold:.0%}")
+    print(f"{'stage':24s} {'baseline':>10s} {'candidate':>10s} {'change':>8s}")
+    regressions = 0
+    for name, base, new, change, regressed in rows:
+        if change is None:
+            print(f"{name:24s} {'-' if base is None else base:>10} {'-' if new is None else new:>10} {'n/a':>8s}")
+            continue
+        regressions += regressed
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:24s} {base:10.2f} {new:10.2f} {change:+8.1%}{flag}")
+    print(f"{regressions} regression(s) above {args.threshold:.0%}.")
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Benchmark the pipeline and write a JSON report.")
+    run_parser.add_argument("--samples", help="Directory of face images; synthetic frames when omitted.")
+    run_parser.add_argument("--frames", type=int, default=8)
+    run_parser.add_argument("--width", type=int, default=1280)
+    run_parser.add_argument("--height", type=int, default=720)
+    run_parser.add_argument("--repeat", type=int, default=50)
+    run_parser.add_argument("--warmup", type=int, default=3)
+    run_parser.add_argument("--requests", type=int, default=40, help="End-to-end verifications to time.")
+    run_parser.add_argument("--concurrency", type=int, default=4)
+    run_parser.add_argument("--output", help="Report path; defaults to log_files/benchmarks/.")
+
+    compare_parser = commands.add_parser("compare", help="Flag stages that regressed between two reports.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+    compare_parser.add_argument("--metric", default="p95_ms", choices=[f"p{q}_ms" for q in PERCENTILES] + ["mean_ms"])
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
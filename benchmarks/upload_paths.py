@@ -0,0 +1,99 @@
+# upload_paths.py
+"""Compare the legacy data-URI form upload with raw binary multipart parts.
+
+Usage:
+    python -m benchmarks.upload_paths [--frames 8] [--width 1280] [--height 720] [--repeat 50]
+
+Both paths are parsed by ImageDataHandler from an in-memory ASGI stream,
+converted with convert_image_slots and decoded into FrameData, which is the
+work the login and registration endpoints do before liveness/embedding.
+"""
+
+import time
+import base64
+import asyncio
+import argparse
+import statistics
+
+import cv2
+import numpy as np
+from starlette.requests import Request
+
+from auth_logic.usr_entities.frame_entity import FrameData
+from phases.app_phase.user_application import ImageDataHandler, convert_image_slots
+
+BOUNDARY = b"----benchboundary"
+
+
+def synthetic_jpegs(count: int, width: int, height: int) -> list:
+    """Encode smooth random frames as JPEG (noise would inflate sizes unrealistically)."""
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(count):
+        small = rng.integers(0, 255, size=(height // 16, width // 16, 3), dtype=np.uint8)
+        frame = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+        frames.append(cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes())
+    return frames
+
+
+def multipart_body(jpegs: list, as_data_uri: bool) -> bytes:
+    parts = []
+    for i, jpeg in enumerate(jpegs):
+        name = f"img_{i + 1}".encode()
+        if as_data_uri:
+            payload = b"data:image/jpeg;base64," + base64.b64encode(jpeg)
+            header = b'Content-Disposition: form-data; name="' + name + b'"\r\n\r\n'
+        else:
+            payload = jpeg
+            header = (b'Content-Disposition: form-data; name="' + name + b'"; filename="' + name
+                      + b'.jpg"\r\nContent-Type: image/jpeg\r\n\r\n')
+        parts.append(b"--" + BOUNDARY + b"\r\n" + header + payload + b"\r\n")
+    return b"".join(parts) + b"--" + BOUNDARY + b"--\r\n"
+
+
+def make_request(body: bytes, chunk_size: int = 64 * 1024) -> Request:
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+    async def receive():
+        if chunks:
+            return {"type": "http.request", "body": chunks.pop(0), "more_body": bool(chunks)}
+        return {"type": "http.disconnect"}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/",
+        "headers": [(b"content-type", b"multipart/form-data; boundary=" + BOUNDARY)],
+    }
+    return Request(scope, receive)
+
+
+async def run_path(body: bytes) -> float:
+    start = time.perf_counter()
+    handler = ImageDataHandler(make_request(body))
+    await handler.extract_form_images()
+    frames = [FrameData.from_bytes(data) for data in convert_image_slots(handler.image_slots)]
+    assert all(frame.bgr.size for frame in frames)
+    return (time.perf_counter() - start) * 1000
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=8)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    jpegs = synthetic_jpegs(args.frames, args.width, args.height)
+    for label, as_data_uri in (("data-uri", True), ("raw-multipart", False)):
+        body = multipart_body(jpegs, as_data_uri)
+        timings = [asyncio.run(run_path(body)) for _ in range(args.repeat)]
+        print(
+            f"{label:14s} upload={len(body) / 1024:8.1f} KiB  "
+            f"median={statistics.median(timings):7.2f} ms  min={min(timings):7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
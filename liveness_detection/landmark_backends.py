@@ -0,0 +1,95 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from auth_logic.usr_constants.embed_cfg import LANDMARK_BACKEND
+from auth_logic.inference.model_registry import model_registry
+
+# Eye points in dlib order (p1..p6 of the EAR formula), left eye in the image first
+DLIB_EYE_INDICES = list(range(36, 48))
+MESH_EYE_INDICES = [33, 160, 158, 133, 153, 144, 362, 385, 387, 263, 373, 380]
+
+
+def face_roi(frame, box: Tuple[int, int, int, int], pad_ratio: float) -> Tuple[int, int, int, int]:
+    """Padded face region (x0, y0, x1, y1) clipped to the frame."""
+    x, y, bw, bh = box
+    h, w = frame.shape[:2]
+    pad = int(pad_ratio * max(bw, bh))
+    return max(x - pad, 0), max(y - pad, 0), min(x + bw + pad, w), min(y + bh + pad, h)
+
+
+class LandmarkBackend(ABC):
+    """Places the 12 eye landmarks inside a face box that has already been detected."""
+
+    name = "base"
+    models: Tuple[str, ...] = ()
+
+    def __init__(self, registry=model_registry) -> None:
+        self.registry = registry
+
+    @abstractmethod
+    def eye_landmarks(self, frame, box: Tuple[int, int, int, int]) -> Optional[np.ndarray]:
+        """(12, 2) float32 eye points in source pixels, or None."""
+
+
+class DlibLandmarkBackend(LandmarkBackend):
+    """dlib 68-point shape predictor run on a grayscale face ROI (~100 MB model)."""
+
+    name = "dlib"
+    models = ("landmark_predictor",)
+
+    def eye_landmarks(self, frame, box):
+        import dlib
+
+        x, y, bw, bh = box
+        gray = frame.cached_gray
+        if gray is not None:
+            x0, y0 = 0, 0
+        else:
+            x0, y0, x1, y1 = face_roi(frame, box, 0.1)
+            gray = cv2.cvtColor(frame.bgr[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+        rect = dlib.rectangle(x - x0, y - y0, x - x0 + bw, y - y0 + bh)
+        shape = self.registry.get("landmark_predictor")(gray, rect)
+        if shape.num_parts < 48:
+            return None
+        points = np.array([(shape.part(i).x, shape.part(i).y) for i in DLIB_EYE_INDICES], dtype=np.float32)
+        points += (x0, y0)
+        return points
+
+
+class MeshLandmarkBackend(LandmarkBackend):
+    """MediaPipe face mesh run on an RGB face ROI (a few MB, no extra model file)."""
+
+    name = "mediapipe"
+    models = ("face_mesh",)
+
+    def eye_landmarks(self, frame, box):
+        x0, y0, x1, y1 = face_roi(frame, box, 0.25)
+        rgb = frame.cached_rgb
+        if rgb is not None:
+            roi = np.ascontiguousarray(rgb[y0:y1, x0:x1])
+        else:
+            roi = cv2.cvtColor(frame.bgr[y0:y1, x0:x1], cv2.COLOR_BGR2RGB)
+        with self.registry.acquire("face_mesh") as mesh:
+            results = mesh.process(roi)
+        if not results.multi_face_landmarks:
+            return None
+        landmarks = results.multi_face_landmarks[0].landmark
+        points = np.array([(landmarks[i].x, landmarks[i].y) for i in MESH_EYE_INDICES], dtype=np.float32)
+        # Mesh coordinates are relative to the ROI
+        points *= (x1 - x0, y1 - y0)
+        points += (x0, y0)
+        return points
+
+
+LANDMARK_BACKENDS = {backend.name: backend for backend in (DlibLandmarkBackend, MeshLandmarkBackend)}
+
+
+def get_landmark_backend(name: str = LANDMARK_BACKEND, registry=model_registry) -> LandmarkBackend:
+    """Instantiate the configured landmark backend."""
+    try:
+        return LANDMARK_BACKENDS[name](registry)
+    except KeyError:
+        raise ValueError(f"Unknown landmark backend '{name}', expected one of {sorted(LANDMARK_BACKENDS)}.")
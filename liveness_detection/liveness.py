@@ -1,28 +1,80 @@
-import cv2
-import dlib
-from scipy.spatial import distance
-
-class LivenessDetector:
-    def __init__(self):
-        self.detector = dlib.get_frontal_face_detector()
-        self.predictor = dlib.shape_predictor("shape_predictor_68_face_landmarks.dat")
-
-    def detect_blinks(self, frame):
-        # Use Dlib to detect face and eye landmarks
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.detector(gray)
-        for face in faces:
-            landmarks = self.predictor(gray, face)
-            left_eye_ratio = self._get_eye_aspect_ratio(landmarks, [36, 37, 38, 39, 40, 41])
-            right_eye_ratio = self._get_eye_aspect_ratio(landmarks, [42, 43, 44, 45, 46, 47])
-            blink_ratio = (left_eye_ratio + right_eye_ratio) / 2
-            if blink_ratio < 0.2:
-                return True
+import numpy as np
+
+from auth_logic.usr_constants.embed_cfg import LIVENESS_EAR_CLOSED, LIVENESS_EAR_OPEN
+from auth_logic.validation.face_analysis import face_analyzer
+
+OPEN, UNSURE, CLOSED = 1, 0, -1
+
+
+def eye_aspect_ratios(landmarks: np.ndarray) -> np.ndarray:
+    """Mean eye aspect ratio of both eyes for an (N, 12, 2) landmark array.
+
+    Points follow the dlib eye order (p1..p6 per eye), so
+    EAR = (|p2 - p6| + |p3 - p5|) / (2 |p1 - p4|). Rows that are NaN
+    (no face or no landmarks) give NaN.
+    """
+    eyes = np.asarray(landmarks, dtype=np.float32).reshape(-1, 2, 6, 2)
+    vertical = np.linalg.norm(eyes[:, :, 1] - eyes[:, :, 5], axis=-1) + np.linalg.norm(eyes[:, :, 2] - eyes[:, :, 4], axis=-1)
+    horizontal = np.linalg.norm(eyes[:, :, 0] - eyes[:, :, 3], axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (vertical / (2.0 * horizontal)).mean(axis=1)
+
+
+def eye_states(ears: np.ndarray, closed: float = LIVENESS_EAR_CLOSED, open_: float = LIVENESS_EAR_OPEN) -> np.ndarray:
+    """OPEN, CLOSED or UNSURE per frame; the band between thresholds and NaN are UNSURE."""
+    ears = np.asarray(ears, dtype=np.float32)
+    states = np.full(ears.shape, UNSURE, dtype=np.int8)
+    states[ears >= open_] = OPEN
+    states[ears < closed] = CLOSED
+    return states
+
+
+def has_blink(states: np.ndarray) -> bool:
+    """True when the sequence contains open, then closed, then open again."""
+    runs = states[states != UNSURE]
+    if len(runs) < 3:
         return False
+    # Collapse repeats so a blink is the run pattern OPEN, CLOSED, OPEN
+    runs = runs[np.insert(runs[1:] != runs[:-1], 0, True)]
+    return bool(np.any((runs[:-2] == OPEN) & (runs[1:-1] == CLOSED) & (runs[2:] == OPEN)))
+
+
+class LivenessEngine:
+    """Blink liveness over a whole frame sequence.
+
+    Eye landmarks come from the shared face analysis; EAR is computed for all
+    frames in one array operation and the sequence passes when it shows an
+    open -> closed -> open transition.
+    """
+
+    def __init__(self, analyzer=face_analyzer, closed: float = LIVENESS_EAR_CLOSED, open_: float = LIVENESS_EAR_OPEN):
+        self.analyzer = analyzer
+        self.closed = closed
+        self.open = open_
+
+    def landmarks(self, frames) -> np.ndarray:
+        """(N, 12, 2) eye landmarks, NaN where a frame has no usable face."""
+        points = np.full((len(frames), 12, 2), np.nan, dtype=np.float32)
+        for i, frame in enumerate(frames):
+            analysis = self.analyzer.analyze(frame)
+            if analysis is not None and analysis.eye_landmarks is not None:
+                points[i] = analysis.eye_landmarks
+        return points
+
+    def ears(self, frames) -> np.ndarray:
+        return eye_aspect_ratios(self.landmarks(frames))
+
+    def check(self, frames) -> bool:
+        """True when the frames contain a complete blink."""
+        return self.check_ears(self.ears(frames))
+
+    def check_ears(self, ears: np.ndarray) -> bool:
+        return has_blink(eye_states(ears, self.closed, self.open))
+
+    def detect_blinks(self, frame) -> bool:
+        """Single-frame check kept for per-frame callers: True when the eyes look closed."""
+        return bool(self.ears([frame])[0] < self.closed)
+
 
-    def _get_eye_aspect_ratio(self, landmarks, eye_points):
-        # Calculate eye aspect ratio to detect blinks
-        A = distance.euclidean(landmarks.part(eye_points[1]).x, landmarks.part(eye_points[5]).x)
-        B = distance.euclidean(landmarks.part(eye_points[2]).x, landmarks.part(eye_points[4]).x)
-        C = distance.euclidean(landmarks.part(eye_points[0]).x, landmarks.part(eye_points[3]).x)
-        return (A + B) / (2.0 * C)
+# Legacy name; the per-frame detector is now part of the sequence engine
+LivenessDetector = LivenessEngine
@@ -10,18 +10,24 @@ from starlette.responses import RedirectResponse
 from starlette.staticfiles import StaticFiles
 from utility.middleware_setup import initialize_middleware
 from utility.route_setup import configure_routes
+from utility.worker_pool import shutdown_worker_pool
+from utility.app_health import warmup_state
+from auth_logic.usr_constants.embed_cfg import WARMUP_ON_START
+
+# Resolved from this file so the app also starts from other working directories
+STATIC_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
 
 # Set up basic logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def build_app() -> FastAPI:
+def build_app(warmup_models: bool = WARMUP_ON_START) -> FastAPI:
     """Build and returns the FastAPI application object."""
     logging.info("Starting up the FastAPI application...")
     
     app = FastAPI()
     
     # Mount static files to serve static content
-    app.mount("/static", StaticFiles(directory='static_files'), name="static_content")
+    app.mount("/static", StaticFiles(directory=STATIC_DIRECTORY), name="static_content")
     
     # Initialize middleware and routes
     initialize_middleware(app)
@@ -29,6 +35,11 @@ def build_app() -> FastAPI:
     
     logging.info("Middleware and routes have been set up successfully.")
 
+    app.add_event_handler("shutdown", shutdown_worker_pool)
+
+    # Models, the face pipeline and the gallery load in the background; /readyz reports when done
+    app.add_event_handler("startup", warmup_state.start if warmup_models else warmup_state.skip)
+
     @app.get("/")
     def redirect_to_auth():
         """Redirects to the authentication page"""
@@ -1,15 +1,43 @@
-import os, io, base64
+import os, base64, asyncio
 from typing import List, Optional
-from fastapi import APIRouter, File, Request
+from fastapi import APIRouter, File, Request, WebSocket
+from starlette.websockets import WebSocketDisconnect
 from starlette import status
 from starlette.responses import JSONResponse, RedirectResponse, HTMLResponse
 from fastapi.templating import Jinja2Templates
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
 
-from phases.auth_phase.user_authentikator import fetch_user_info  
-from auth_logic.validation.au_processes import (
-    ValidateLoginEmbed,
-    ValidateRegisterEmbed,
+from phases.auth_phase.user_authentikator import (
+    FULL_SCOPE,
+    PASSWORD_SCOPE,
+    fetch_user_details,
+    grant_full_access,
+    issue_stream_ticket,
+    redeem_stream_ticket,
 )
+# The face pipeline is imported on first use, so the app starts without OpenCV and the models
+from auth_logic.validation.face_pipeline import (
+    embed_probe_images,
+    identify_probe,
+    register_user_images,
+    stream_verifier,
+    verify_login_images,
+)
+from auth_logic.validation.sequential_decision import ACCEPT, PENDING
+from auth_logic.inference.gallery_index import gallery_index
+from auth_logic.connect_data.usr_emb_ops import EmbDataHandler
+from auth_logic.usr_log.metrics import stage
+from auth_logic.usr_constants.serve_cfg import (
+    IDENTIFY_ENABLED,
+    IDENTIFY_MAX_TOP_K,
+    IDENTIFY_OPERATORS,
+    IDENTIFY_TOP_K,
+    MAX_IMAGE_PART_BYTES,
+    MAX_TEXT_FIELD_BYTES,
+    STREAM_TIMEOUT_S,
+)
+from utility.worker_pool import run_blocking, run_cpu_bound, run_cpu_bound_local
 
 app_handler = APIRouter(
     prefix="/app_routes",  # Unique route prefix
@@ -22,29 +50,139 @@ tpl_renderer = Jinja2Templates(directory=os.path.join(os.getcwd(), "templates"))
 # Environment variable change for GPU/CPU usage
 os.environ["CUDA_PREFERENCE"] = "-1"
 
+IMAGE_SLOT_NAMES = [f"img_{i+1}" for i in range(8)]
+
+class FormParseError(ValueError):
+    """The upload is not a form we can read; routes answer 400."""
+
+class _FormPartCollector:
+    """Multipart parser callbacks that keep only image slots and small text fields.
+
+    An image slot over MAX_IMAGE_PART_BYTES rejects the request. A text field
+    over MAX_TEXT_FIELD_BYTES is dropped and its name recorded in ``dropped``,
+    so a stray large field cannot fail an otherwise valid upload.
+    """
+
+    def __init__(self):
+        self.images = {}
+        self.fields = {}
+        self.dropped = []
+        self._header_field = b""
+        self._header_value = b""
+        self._headers = {}
+        self._name = None
+        self._buffer = None
+        self._binary = False
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+        self._name = None
+        self._buffer = None
+
+    def on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("latin-1")
+        content_type = self._headers.get(b"content-type", b"text/plain")
+        # File parts and image/* parts carry raw encoded frames; the rest are text fields
+        self._binary = b"filename" in options or content_type.startswith(b"image/")
+        if name in IMAGE_SLOT_NAMES or not self._binary:
+            self._name = name
+            self._buffer = bytearray()
+
+    def on_part_data(self, data, start, end):
+        if self._buffer is None:
+            return
+        self._buffer += data[start:end]
+        if self._name in IMAGE_SLOT_NAMES:
+            if len(self._buffer) > MAX_IMAGE_PART_BYTES:
+                raise FormParseError(f"Form part '{self._name}' exceeds {MAX_IMAGE_PART_BYTES} bytes.")
+        elif len(self._buffer) > MAX_TEXT_FIELD_BYTES:
+            self.dropped.append(self._name)
+            self._buffer = None
+
+    def on_part_end(self):
+        if self._buffer is None:
+            return
+        if self._name in IMAGE_SLOT_NAMES:
+            # Raw parts stay binary; legacy data-URI fields stay text for convert_image_data
+            self.images[self._name] = self._buffer if self._binary else self._buffer.decode("latin-1")
+        else:
+            self.fields[self._name] = self._buffer.decode("utf-8", errors="replace")
+        self._buffer = None
+
 class ImageDataHandler:
     """Class to handle the processing and retrieval of image data from forms."""
     
     def __init__(self, req: Request):
         self.req = req
         self.image_slots = [None] * 8  # Different way to store image data
+        self.fields = {}
 
     async def extract_form_images(self):
-        """Extract images from form data."""
-        form_data = await self.req.form()
-        self.image_slots = [form_data.get(f"img_{i+1}") for i in range(8)]  # Different naming pattern
+        """Extract images from form data.
+
+        Multipart bodies are parsed incrementally from the request stream, so
+        raw JPEG/WebP parts are kept as bytes without spooling the whole form.
+        Legacy data-URI fields and urlencoded forms are still accepted.
+        Raises FormParseError for a malformed multipart body.
+        """
+        with stage("upload"):
+            content_type, options = parse_options_header(self.req.headers.get("content-type", ""))
+            if content_type != b"multipart/form-data":
+                form_data = await self.req.form()
+                self.fields = {key: value for key, value in form_data.items() if key not in IMAGE_SLOT_NAMES}
+                self.image_slots = [form_data.get(name) for name in IMAGE_SLOT_NAMES]
+                return
 
-async def redirect_if_not_authenticated(req: Request):
-    """Redirect to login if user is not authenticated."""
-    user_info = await fetch_user_info(req)
+            boundary = options.get(b"boundary")
+            if not boundary:
+                raise FormParseError("Multipart form without a boundary.")
+            collector = _FormPartCollector()
+            parser = MultipartParser(boundary, collector.callbacks())
+            try:
+                async for chunk in self.req.stream():
+                    parser.write(chunk)
+                parser.finalize()
+            except MultipartParseError as e:
+                raise FormParseError(str(e)) from e
+            self.fields = collector.fields
+            self.image_slots = [collector.images.get(name) for name in IMAGE_SLOT_NAMES]
+
+async def redirect_if_not_authenticated(req: Request, scopes=(FULL_SCOPE,)):
+    """Redirect to login unless the access token has one of ``scopes`` (full access by default)."""
+    user_info = await fetch_user_details(req, scopes)
     if not user_info:
-        return RedirectResponse(url="/auth_route", status_code=status.HTTP_302_FOUND)
+        return RedirectResponse(url="/userauth/", status_code=status.HTTP_302_FOUND)
     return user_info
 
 @app_handler.get("/", response_class=HTMLResponse)
 async def display_app_page(req: Request):
     try:
         user_details = await redirect_if_not_authenticated(req)
+        if not isinstance(user_details, dict):
+            return user_details
         return tpl_renderer.TemplateResponse(
             "embedded_login.html",
             context={"request": req, "status_code": status.HTTP_200_OK, "msg": "Login Successful", "user": user_details['username']}
@@ -61,26 +199,37 @@ async def execute_login_embedding(req: Request):
     """Handles embedding process during login."""
 
     try:
-        user_data = await redirect_if_not_authenticated(req)
-
-        embed_validator = ValidateLoginEmbed(user_data["user_identifier"])
+        # The second factor: a password-scope token is enough to attempt it
+        user_data = await redirect_if_not_authenticated(req, (PASSWORD_SCOPE, FULL_SCOPE))
+        if not isinstance(user_data, dict):
+            return user_data
 
         image_processor = ImageDataHandler(req)
         await image_processor.extract_form_images()
-        img_data_set = [convert_image_data(img) for img in image_processor.image_slots]
+        images = [img for img in image_processor.image_slots if img]
+        img_data_set = await run_blocking(convert_image_slots, images)
 
-        if embed_validator.compare_stored_embeddings(img_data_set):
-            return tpl_renderer.TemplateResponse(
+        # Decoding, liveness, embedding and the DB lookup all run off the event loop
+        if await run_cpu_bound(verify_login_images, user_data["uuid"], img_data_set):
+            resp = tpl_renderer.TemplateResponse(
                 "embedded_login.html",
                 status_code=status.HTTP_200_OK,
                 context={"request": req, "status_code": status.HTTP_200_OK, "msg": "User Verified", "user": user_data['username']}
             )
+            grant_full_access(resp, user_data["uuid"], user_data["username"])
+            return resp
         else:
             return tpl_renderer.TemplateResponse(
                 "unauthorized_access.html",
                 status_code=status.HTTP_404_NOT_FOUND,
-                context={"status": False, 'status_code': status.HTTP_404_NOT_FOUND, "msg": "Authentication Unsuccessful"}
+                context={"request": req, "status": False, 'status_code': status.HTTP_404_NOT_FOUND, "msg": "Authentication Unsuccessful"}
             )
+    except FormParseError:
+        return tpl_renderer.TemplateResponse(
+            "unauthorized_access.html",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            context={"request": req, "status": False, "msg": "Invalid Upload"}
+        )
     except Exception as e:
         return tpl_renderer.TemplateResponse(
             "unauthorized_access.html",
@@ -93,7 +242,7 @@ async def render_registration_page(req: Request):
     try:
         user_id = req.session.get("user_identifier")
         if user_id is None:
-            return RedirectResponse(url="/auth_route", status_code=status.HTTP_302_FOUND)
+            return RedirectResponse(url="/userauth/", status_code=status.HTTP_302_FOUND)
         return tpl_renderer.TemplateResponse(
             "embedded_registration.html",
             context={"request": req, "status_code": status.HTTP_200_OK, "msg": "Proceed to Registration"}
@@ -112,20 +261,27 @@ async def execute_registration_embedding(req: Request):
     try:
         user_id = req.session.get("user_identifier")
         if user_id is None:
-            return RedirectResponse(url="/auth_route", status_code=status.HTTP_302_FOUND)
+            return RedirectResponse(url="/userauth/", status_code=status.HTTP_302_FOUND)
         
         image_processor = ImageDataHandler(req)
         await image_processor.extract_form_images()
-        img_data_set = [convert_image_data(img) for img in image_processor.image_slots]
-    
-        reg_validator = ValidateRegisterEmbed(user_id)
-        reg_validator.save_user_embeddings(img_data_set)
+        images = [img for img in image_processor.image_slots if img]
+        img_data_set = await run_blocking(convert_image_slots, images)
+
+        enrolled = await run_cpu_bound(register_user_images, user_id, img_data_set)
+        index_enrollment(user_id, enrolled)
 
         return tpl_renderer.TemplateResponse(
             "login_screen.html",
             status_code=status.HTTP_200_OK,
             context={"request": req, "status": False, "msg": "Embedding Successfully Stored"}
         )
+    except FormParseError:
+        return tpl_renderer.TemplateResponse(
+            "error_screen.html",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            context={"request": req, "status": False, "msg": "Invalid Upload"}
+        )
     except Exception as e:
         return tpl_renderer.TemplateResponse(
             "error_screen.html",
@@ -133,6 +289,151 @@ async def execute_registration_embedding(req: Request):
             context={"request": req, "status": False, "msg": "Error Storing Embedding"}
         )
 
+@app_handler.post("/identify")
+async def execute_identification(req: Request):
+    """Return the top-k enrolled users that match the submitted face frames."""
+
+    try:
+        user_data = await redirect_if_not_authenticated(req)
+        if not isinstance(user_data, dict):
+            return user_data
+        if not IDENTIFY_ENABLED:
+            return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"status": False, "msg": "Identification disabled"})
+        # Until the warmup has built the gallery, a search would miss enrolled users
+        if not gallery_index.loaded:
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"status": False, "msg": "Identification index is loading"},
+            )
+        # Results name other users, so only configured operators may search the gallery
+        if user_data["uuid"] not in IDENTIFY_OPERATORS:
+            return JSONResponse(status_code=status.HTTP_403_FORBIDDEN, content={"status": False, "msg": "Not allowed to identify"})
+
+        image_processor = ImageDataHandler(req)
+        await image_processor.extract_form_images()
+        images = [img for img in image_processor.image_slots if img]
+        top_k = parse_top_k(image_processor.fields.get("top_k"))
+        if top_k is None:
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"status": False, "msg": "top_k must be a positive integer"},
+            )
+        img_data_set = await run_blocking(convert_image_slots, images)
+
+        probe = await run_cpu_bound(embed_probe_images, img_data_set)
+        matches = await run_blocking(identify_probe, probe, top_k)
+        return JSONResponse(status_code=status.HTTP_200_OK, content={"status": True, "matches": matches})
+    except FormParseError:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"status": False, "msg": "Invalid Upload"})
+    except Exception as e:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"status": False, "msg": "Error Processing Identification"},
+        )
+
+@app_handler.websocket("/stream_verify")
+async def stream_verification(ws: WebSocket):
+    """Verify frames as they are captured and answer as soon as a decision is clear.
+
+    The client sends each frame as a binary JPEG/WebP message (or a data URI
+    text message) and receives a JSON progress/decision message per frame.
+    An accepting decision carries a single-use ``ticket``; the client posts it
+    to /stream_login for the full-access cookie instead of re-uploading frames.
+    """
+    try:
+        # A face check like POST /; a socket cannot set cookies, so access is granted via the ticket
+        user_info = await fetch_user_details(ws, (PASSWORD_SCOPE, FULL_SCOPE))
+    except Exception:
+        user_info = None
+    if not isinstance(user_info, dict):
+        await ws.close(code=1008)
+        return
+
+    await ws.accept()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_TIMEOUT_S
+    try:
+        verifier = await run_blocking(stream_verifier, user_info["uuid"])
+        result = {"decision": PENDING}
+        while result["decision"] == PENDING:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                result = verifier.finish()
+                break
+            try:
+                message = await asyncio.wait_for(ws.receive(), timeout=remaining)
+            except asyncio.TimeoutError:
+                result = verifier.finish()
+                break
+            if message["type"] == "websocket.disconnect":
+                return
+            data = message.get("bytes") or convert_image_data(message.get("text") or "")
+            result = await run_cpu_bound_local(verifier.add_frame, data)
+            if result["decision"] == PENDING:
+                await ws.send_json(result)
+        if result["decision"] == ACCEPT:
+            result["ticket"] = issue_stream_ticket(user_info["uuid"], user_info["username"])
+        await ws.send_json(result)
+    except WebSocketDisconnect:
+        # Client went away; there is nobody left to answer
+        return
+    except Exception as e:
+        try:
+            await ws.send_json({"decision": "error", "msg": "Error Processing Stream"})
+        except Exception:
+            return
+    await ws.close()
+
+@app_handler.post("/stream_login")
+async def redeem_stream_login(req: Request):
+    """Exchange the ticket of an accepted /stream_verify session for the full-access cookie."""
+
+    try:
+        user_data = await redirect_if_not_authenticated(req, (PASSWORD_SCOPE, FULL_SCOPE))
+        if not isinstance(user_data, dict):
+            return user_data
+        form = await req.form()
+        # The ticket must belong to the same user as the password-scope cookie
+        if not redeem_stream_ticket(form.get("ticket") or "", user_data["uuid"]):
+            return JSONResponse(status_code=status.HTTP_401_UNAUTHORIZED, content={"status": False, "msg": "Invalid ticket"})
+        resp = JSONResponse(status_code=status.HTTP_200_OK, content={"status": True, "next": "/app_routes/"})
+        grant_full_access(resp, user_data["uuid"], user_data["username"])
+        return resp
+    except Exception as e:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"status": False, "msg": "Error Processing Ticket"})
+
+def index_enrollment(user_id: str, embedding) -> None:
+    """Add a saved enrollment to the gallery.
+
+    The gallery lives in the serving process and process-pool workers cannot
+    update it, so gallery maintenance happens here after the job has returned.
+    """
+    if IDENTIFY_ENABLED:
+        gallery_index.upsert(user_id, embedding)
+
+async def delete_user_embedding(user_id: str) -> None:
+    """Delete a user's stored embedding and drop them from the gallery."""
+    await run_blocking(EmbDataHandler().delete_embed, user_id)
+    if IDENTIFY_ENABLED:
+        gallery_index.remove(user_id)
+
+def parse_top_k(value) -> Optional[int]:
+    """``top_k`` form value clamped to IDENTIFY_MAX_TOP_K; None when it is not a positive integer."""
+    if value is None or value == "":
+        return IDENTIFY_TOP_K
+    try:
+        top_k = int(value)
+    except (TypeError, ValueError):
+        return None
+    if top_k < 1:
+        return None
+    return min(top_k, IDENTIFY_MAX_TOP_K)
+
 def convert_image_data(data_uri):
     """Convert base64 image data to raw bytes."""
-    return io.BytesIO(base64.b64decode(data_uri[data_uri.find(",") + 1:])).getvalue()
+    return base64.b64decode(data_uri[data_uri.find(",") + 1:])
+
+def convert_image_slots(image_slots):
+    """Return raw bytes for every slot: data URIs are decoded, binary parts pass through."""
+    with stage("upload"):
+        return [img if isinstance(img, (bytes, bytearray)) else convert_image_data(img) for img in image_slots]
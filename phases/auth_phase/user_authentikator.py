@@ -1,6 +1,8 @@
 # user_authentikator.py
 
 import os
+import uuid
+import threading
 from starlette.responses import JSONResponse, HTMLResponse, RedirectResponse
 from fastapi import HTTPException, status, APIRouter, Request, Response
 from pydantic import BaseModel
@@ -9,10 +11,10 @@ from datetime import datetime, timedelta
 from jose import jwt, JWTError
 from fastapi.templating import Jinja2Templates
 
-from auth_logic.validation.au_processes import LoginCheck
 from auth_logic.usr_entities.usr_data_entity import UserData
 from auth_logic.validation.validation_process import ValidateUserRegistration, ValidateUserLogin
 from auth_logic.usr_constants.auth_cfg import SEC_KEY_NEW, ALGO_TYPE
+from utility.worker_pool import run_blocking
 
 template_loader = Jinja2Templates(directory=os.path.join(os.getcwd(), "viewpages"))
 
@@ -22,12 +24,30 @@ auth_router = APIRouter(
     responses={"401": {"description": "Unauthorized"}},
 )
 
-async def fetch_user_details(req: Request):
+# Scopes of the access_token cookie. The password login only grants PASSWORD_SCOPE, which
+# is good for the face check alone; a successful face check upgrades it to FULL_SCOPE.
+PASSWORD_SCOPE = "password"
+FULL_SCOPE = "full"
+PASSWORD_TOKEN_MINUTES = 5
+FULL_TOKEN_MINUTES = 15
+# A stream face check that accepts returns a ticket, redeemed once for the full-scope cookie
+STREAM_TICKET_SCOPE = "stream_ticket"
+STREAM_TICKET_SECONDS = 30
+
+# Ids of redeemed stream tickets until they expire, so each ticket works once per process
+_redeemed_tickets = {}
+_tickets_lock = threading.Lock()
+
+async def fetch_user_details(req: Request, scopes=(FULL_SCOPE,)):
+    """User of the access_token cookie, or None when it is missing or not one of ``scopes``."""
     token = req.cookies.get("access_token")
     if not token:
         return None
 
-    return decode_jwt_token(token)
+    user = await decode_jwt_token(token)
+    if not isinstance(user, dict) or user["scope"] not in scopes:
+        return None
+    return user
 
 async def decode_jwt_token(token: str):
     try:
@@ -36,37 +56,90 @@ async def decode_jwt_token(token: str):
         uname = data.get("username")
         if not user_id or not uname:
             return None
-        return {"uuid": user_id, "username": uname}
+        return {"uuid": user_id, "username": uname, "scope": data.get("scope")}
     except JWTError:
         raise HTTPException(status_code=404, detail="User not found")
     except Exception as e:
         return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"message": f"Error decoding token: {e}"})
 
-def generate_access_token(user_id: str, uname: str, exp_delta: Optional[timedelta] = None) -> str:
-    payload = create_token_payload(user_id, uname, exp_delta)
+def generate_access_token(user_id: str, uname: str, exp_delta: Optional[timedelta] = None, scope: str = FULL_SCOPE) -> str:
+    payload = create_token_payload(user_id, uname, exp_delta, scope)
+    return jwt.encode(payload, SEC_KEY_NEW, algorithm=ALGO_TYPE)
+
+def create_token_payload(user_id: str, uname: str, exp_delta: Optional[timedelta], scope: str = FULL_SCOPE) -> dict:
+    expire = datetime.utcnow() + (exp_delta if exp_delta else timedelta(minutes=FULL_TOKEN_MINUTES))
+    return {"sub": user_id, "username": uname, "scope": scope, "exp": expire}
+
+def grant_full_access(resp: Response, user_id: str, uname: str) -> None:
+    """Replace the access_token cookie with a full-access token after a successful face check."""
+    token = generate_access_token(user_id, uname, timedelta(minutes=FULL_TOKEN_MINUTES), FULL_SCOPE)
+    resp.set_cookie(key="access_token", value=token, httponly=True)
+
+def issue_stream_ticket(user_id: str, uname: str) -> str:
+    """Short-lived, single-use ticket for a user whose streamed face check accepted."""
+    expire = datetime.utcnow() + timedelta(seconds=STREAM_TICKET_SECONDS)
+    payload = {"sub": user_id, "username": uname, "scope": STREAM_TICKET_SCOPE, "jti": uuid.uuid4().hex, "exp": expire}
     return jwt.encode(payload, SEC_KEY_NEW, algorithm=ALGO_TYPE)
 
-def create_token_payload(user_id: str, uname: str, exp_delta: Optional[timedelta]) -> dict:
-    expire = datetime.utcnow() + (exp_delta if exp_delta else timedelta(minutes=15))
-    return {"sub": user_id, "username": uname, "exp": expire}
+def redeem_stream_ticket(ticket: str, user_id: str) -> bool:
+    """Check a stream ticket was issued to ``user_id``, and mark it used; False if invalid, expired or reused."""
+    try:
+        data = jwt.decode(ticket, SEC_KEY_NEW, algorithms=[ALGO_TYPE])
+    except JWTError:
+        return False
+    if data.get("scope") != STREAM_TICKET_SCOPE or data.get("sub") != user_id or not data.get("jti"):
+        return False
+    now = datetime.utcnow().timestamp()
+    with _tickets_lock:
+        for jti in [jti for jti, exp in _redeemed_tickets.items() if exp < now]:
+            del _redeemed_tickets[jti]
+        if data["jti"] in _redeemed_tickets:
+            return False
+        _redeemed_tickets[data["jti"]] = data["exp"]
+    return True
+
+
+class RegistrationForm:
+    """Fields of the registration form."""
+
+    def __init__(self, req: Request):
+        self.req = req
+        self.name = None
+        self.uname = None
+        self.email = None
+        self.phone = None
+        self.password_main = None
+        self.pwd2 = None
+
+    async def populate_form(self):
+        form = await self.req.form()
+        self.name = form.get("name")
+        self.uname = form.get("username")
+        self.email = form.get("email")
+        self.phone = form.get("phone")
+        self.password_main = form.get("password")
+        self.pwd2 = form.get("password2")
 
 
 @auth_router.post("/token_auth")
-async def login_with_token(resp: Response, login_data) -> dict:
-    user_val = ValidateUserLogin(login_data['email'], login_data['password'])
-    user = user_val.authenticate_user()
+async def login_with_token(req: Request):
+    """First factor: check email and password and set a short-lived password-scope token.
+
+    The token only allows the face check (POST /app_routes/ or /app_routes/stream_verify);
+    POST /app_routes/ replaces it with the full-access token once the face matches, and
+    POST /app_routes/stream_login does the same for a stream that accepted.
+    """
+    form = await req.form()
+    user_val = ValidateUserLogin(form.get("email") or "", form.get("password") or "")
+    user = await run_blocking(user_val.authenticate_user)  # bcrypt + Mongo lookup
     if not user:
-        return {"status": False, "uuid": None, "response": resp}
-    
-    # Liveness check with blink detection during authentication
-    liveness_check = LoginCheck(user["UUID"])
-    if not liveness_check.match_embed(login_data['images']):  # Pass the images for liveness and embedding check
-        return {"status": False, "uuid": None, "response": resp}
-
-    token_exp = timedelta(minutes=15)
-    token = generate_access_token(user["UUID"], user["username"], exp_delta=token_exp)
+        return JSONResponse(status_code=status.HTTP_401_UNAUTHORIZED, content={"status": False, "uuid": None})
+
+    token_exp = timedelta(minutes=PASSWORD_TOKEN_MINUTES)
+    token = generate_access_token(user["UUID"], user["username"], exp_delta=token_exp, scope=PASSWORD_SCOPE)
+    resp = JSONResponse(content={"status": True, "uuid": user["UUID"], "next": "/app_routes/"})
     resp.set_cookie(key="access_token", value=token, httponly=True)
-    return {"status": True, "uuid": user["UUID"], "response": resp}
+    return resp
 
 
 @auth_router.get("/", response_class=HTMLResponse)
@@ -84,16 +157,17 @@ async def process_user_registration(req: Request):
     form = RegistrationForm(req)
     await form.populate_form()
     new_user = UserData(form.name, form.uname, form.email, form.phone, form.password_main, form.pwd2)
-    req.session["uuid"] = new_user.uid
 
     user_val = ValidateUserRegistration(new_user)
-    validation_result = user_val.validate()
+    validation_result = user_val.verify_registration_details()
 
     if not validation_result["status"]:
         return load_template("login.html", req, validation_result["msg"])
 
-    user_val.save_user()
-    return RedirectResponse(url="/app/register_embedding", status_code=status.HTTP_302_FOUND, headers={"uuid": new_user.uid})
+    await run_blocking(user_val.save_user)  # bcrypt hash + insert
+    # The embedding registration page enrolls the face for this user
+    req.session["user_identifier"] = new_user.identifier
+    return RedirectResponse(url="/app_routes/register_embed", status_code=status.HTTP_302_FOUND, headers={"uuid": new_user.identifier})
 
 @auth_router.get("/logout_user")
 async def logout_user(req: Request):
@@ -187,3 +187,86 @@ function createFormElement(actionUrl, formData) {
 document.getElementById('clearImagesBtn').addEventListener("click", clearStoredImages);
 loadImagesFromLocalStorage();
 document.getElementById("generateEmbeddingsBtn").style.display = "none";
+
+// Streams snapshots to the server over a WebSocket until it returns a decision
+function streamVerification(onDecision, intervalMs) {
+    var scheme = (window.location.protocol === 'https:') ? 'wss://' : 'ws://';
+    var socket = new WebSocket(scheme + window.location.host + '/app_routes/stream_verify');
+    var timer = null;
+
+    socket.binaryType = 'arraybuffer';
+    socket.onopen = function() {
+        timer = setInterval(function() {
+            Webcam.snap(function(data_uri) {
+                if (socket.readyState === WebSocket.OPEN) {
+                    socket.send(dataUriToBlob(data_uri));
+                }
+            });
+        }, intervalMs || 300);
+    };
+    socket.onmessage = function(event) {
+        var result = JSON.parse(event.data);
+        if (result.decision !== 'pending') {
+            clearInterval(timer);
+            socket.close();
+            onDecision(result);
+        }
+    };
+    socket.onclose = function() {
+        clearInterval(timer);
+    };
+    return socket;
+}
+
+// Logs in with the streamed face check: an accepted stream returns a ticket that is
+// exchanged for the full-access cookie, so the frames are never uploaded a second time
+function streamLogin(onReject, intervalMs) {
+    return streamVerification(function(result) {
+        if (result.decision !== 'accept' || !result.ticket) {
+            onReject(result);
+            return;
+        }
+        var formData = new FormData();
+        formData.append('ticket', result.ticket);
+        fetch('/app_routes/stream_login', { method: 'POST', body: formData, credentials: 'same-origin' })
+            .then(function(response) { return response.json(); })
+            .then(function(body) {
+                if (body.status) {
+                    window.location.href = body.next;
+                } else {
+                    onReject(result);
+                }
+            });
+    }, intervalMs);
+}
+
+// Converts a base64 data URI into a binary Blob so frames are sent without base64 overhead
+function dataUriToBlob(dataUri) {
+    var parts = dataUri.split(',');
+    var mime = parts[0].match(/:(.*?);/)[1];
+    var binary = atob(parts[1]);
+    var bytes = new Uint8Array(binary.length);
+    for (var i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+    return new Blob([bytes], { type: mime });
+}
+
+// Posts the stored images as binary multipart parts instead of base64 form fields
+function submitImageBlobs(actionType) {
+    var images = JSON.parse(localStorage.getItem("images"));
+    var formData = new FormData();
+    images.forEach(function(image, index) {
+        var slot = "img_" + (index + 1);
+        formData.append(slot, dataUriToBlob(image), slot + ".jpg");
+    });
+
+    var targetUrl = (actionType == 'login') ? '/app_routes/' : '/app_routes/register_embed';
+    fetch(targetUrl, { method: 'POST', body: formData, credentials: 'same-origin' })
+        .then(function(response) { return response.text(); })
+        .then(function(html) {
+            document.open();
+            document.write(html);
+            document.close();
+        });
+}
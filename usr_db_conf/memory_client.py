@@ -0,0 +1,212 @@
+# usr_db_conf/memory_client.py
+"""In-process stand-in for the MongoDB client, selected with a ``memory://`` DB URL.
+
+Meant for benchmarks and load tests, so the pipeline runs without a Mongo
+server. It covers the subset of the collection API the app uses:
+insert_one, find_one, find (projection, sort, limit, batch_size),
+update_one with ``$set`` and upsert, delete_one and delete_many. Filters
+support equality on (dotted) fields and $gt/$gte/$lt/$lte/$ne/$in/$exists.
+Documents are deep-copied in and out, like a round trip to a server.
+"""
+
+import copy
+import threading
+from typing import Optional
+
+from bson import ObjectId
+from pymongo.results import DeleteResult, InsertOneResult, UpdateResult
+
+_MISSING = object()
+
+
+def _get_path(doc: dict, path: str):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _set_path(doc: dict, path: str, value) -> None:
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def _match_value(value, condition) -> bool:
+    if not (isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition)):
+        return value is not _MISSING and value == condition
+    for op, arg in condition.items():
+        if op == "$exists":
+            if (value is not _MISSING) != bool(arg):
+                return False
+        elif op == "$ne":
+            if value is not _MISSING and value == arg:
+                return False
+        elif op == "$in":
+            if value is _MISSING or value not in arg:
+                return False
+        elif value is _MISSING:
+            return False
+        elif op == "$gt":
+            if not value > arg:
+                return False
+        elif op == "$gte":
+            if not value >= arg:
+                return False
+        elif op == "$lt":
+            if not value < arg:
+                return False
+        elif op == "$lte":
+            if not value <= arg:
+                return False
+        else:
+            raise NotImplementedError(f"Query operator {op} is not supported by the in-memory store.")
+    return True
+
+
+def _matches(doc: dict, query: Optional[dict]) -> bool:
+    return all(_match_value(_get_path(doc, path), condition) for path, condition in (query or {}).items())
+
+
+def _project(doc: dict, projection: Optional[dict]) -> dict:
+    if not projection:
+        return copy.deepcopy(doc)
+    include = {k for k, v in projection.items() if v and k != "_id"}
+    if include:
+        out = {k: copy.deepcopy(doc[k]) for k in include if k in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            out["_id"] = doc["_id"]
+        return out
+    return {k: copy.deepcopy(v) for k, v in doc.items() if projection.get(k, 1)}
+
+
+class MemoryCursor:
+    """Result of ``find``; evaluated lazily so sort and limit can be chained."""
+
+    def __init__(self, docs: list, projection: Optional[dict]) -> None:
+        self._docs = docs
+        self._projection = projection
+        self._sort = None
+        self._limit = 0
+
+    def sort(self, key: str, direction: int = 1) -> "MemoryCursor":
+        self._sort = (key, direction)
+        return self
+
+    def limit(self, count: int) -> "MemoryCursor":
+        self._limit = count
+        return self
+
+    def batch_size(self, size: int) -> "MemoryCursor":
+        return self
+
+    def __iter__(self):
+        docs = self._docs
+        if self._sort is not None:
+            key, direction = self._sort
+            docs = sorted(docs, key=lambda doc: doc.get(key), reverse=direction < 0)
+        if self._limit:
+            docs = docs[:self._limit]
+        return (_project(doc, self._projection) for doc in docs)
+
+
+class MemoryCollection:
+    """A list of documents behind one lock."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._docs = []
+        self._lock = threading.Lock()
+
+    def insert_one(self, document: dict) -> InsertOneResult:
+        doc = copy.deepcopy(document)
+        doc.setdefault("_id", ObjectId())
+        with self._lock:
+            self._docs.append(doc)
+        return InsertOneResult(doc["_id"], True)
+
+    def find_one(self, query: Optional[dict] = None, projection: Optional[dict] = None) -> Optional[dict]:
+        with self._lock:
+            for doc in self._docs:
+                if _matches(doc, query):
+                    return _project(doc, projection)
+        return None
+
+    def find(self, query: Optional[dict] = None, projection: Optional[dict] = None) -> MemoryCursor:
+        with self._lock:
+            docs = [doc for doc in self._docs if _matches(doc, query)]
+        return MemoryCursor(docs, projection)
+
+    def update_one(self, query: dict, update: dict, upsert: bool = False) -> UpdateResult:
+        unsupported = set(update) - {"$set"}
+        if unsupported:
+            raise NotImplementedError(f"Update operators {sorted(unsupported)} are not supported by the in-memory store.")
+        changes = copy.deepcopy(update.get("$set", {}))
+        with self._lock:
+            for doc in self._docs:
+                if _matches(doc, query):
+                    for path, value in changes.items():
+                        _set_path(doc, path, value)
+                    return UpdateResult({"n": 1, "nModified": 1, "updatedExisting": True}, True)
+            if not upsert:
+                return UpdateResult({"n": 0, "nModified": 0, "updatedExisting": False}, True)
+            doc = {path: copy.deepcopy(value) for path, value in query.items() if not isinstance(value, dict)}
+            for path, value in changes.items():
+                _set_path(doc, path, value)
+            doc.setdefault("_id", ObjectId())
+            self._docs.append(doc)
+        return UpdateResult({"n": 1, "nModified": 0, "upserted": doc["_id"], "updatedExisting": False}, True)
+
+    def delete_one(self, query: dict) -> DeleteResult:
+        with self._lock:
+            for i, doc in enumerate(self._docs):
+                if _matches(doc, query):
+                    del self._docs[i]
+                    return DeleteResult({"n": 1}, True)
+        return DeleteResult({"n": 0}, True)
+
+    def delete_many(self, query: dict) -> DeleteResult:
+        with self._lock:
+            kept = [doc for doc in self._docs if not _matches(doc, query)]
+            deleted = len(self._docs) - len(kept)
+            self._docs = kept
+        return DeleteResult({"n": deleted}, True)
+
+    def count_documents(self, query: dict) -> int:
+        with self._lock:
+            return sum(_matches(doc, query) for doc in self._docs)
+
+
+class MemoryDatabase:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = MemoryCollection(name)
+            return self._collections[name]
+
+
+class MemoryClient:
+    """Drop-in for ``pymongo.MongoClient`` holding every database in this process."""
+
+    def __init__(self, url: str = "memory://") -> None:
+        self.url = url
+        self._databases = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        with self._lock:
+            if name not in self._databases:
+                self._databases[name] = MemoryDatabase(name)
+            return self._databases[name]
+
+    def drop_database(self, name: str) -> None:
+        with self._lock:
+            self._databases.pop(name, None)
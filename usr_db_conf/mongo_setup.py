@@ -2,6 +2,9 @@
 
 import pymongo
 from auth_logic.usr_constants.db_cfg import DB_NAME_NEW, DB_URL_NEW
+from usr_db_conf.memory_client import MemoryClient
+
+MEMORY_URL_SCHEME = "memory://"
 
 class MongoDBConn:
     connection = None
@@ -9,7 +12,11 @@ class MongoDBConn:
     def __init__(self, db_name=DB_NAME_NEW) -> None:
         if MongoDBConn.connection is None:
             mongo_url = DB_URL_NEW
-            MongoDBConn.connection = pymongo.MongoClient(mongo_url)
+            if mongo_url.startswith(MEMORY_URL_SCHEME):
+                # In-process store for benchmarks and load tests
+                MongoDBConn.connection = MemoryClient(mongo_url)
+            else:
+                MongoDBConn.connection = pymongo.MongoClient(mongo_url)
         self.connection = MongoDBConn.connection
         self.database = self.connection[db_name]
 
@@ -0,0 +1,95 @@
+# app_health.py
+
+import time
+import logging
+import threading
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from auth_logic.usr_constants.serve_cfg import IDENTIFY_ENABLED
+from auth_logic.inference.model_registry import model_registry
+from auth_logic.inference.gallery_index import gallery_index
+from auth_logic.connect_data.usr_emb_ops import EmbDataHandler
+from auth_logic.validation import face_pipeline
+
+log = logging.getLogger("AppHealth")
+
+PENDING, WARMING, READY, FAILED = "pending", "warming", "ready", "failed"
+
+
+class WarmupState:
+    """Background warmup of the face pipeline; the app serves requests while it runs.
+
+    The warmup imports the pipeline, loads every model registered with
+    ``warm=True`` and builds the identification gallery. ``/readyz`` reports
+    ready once it has finished with every model loaded. With the model warmup
+    skipped the gallery is still built here; ``/identify`` answers 503 until it is.
+    """
+
+    def __init__(self) -> None:
+        self.status = PENDING
+        self.started = None
+        self.elapsed_ms = None
+        self.error = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self, warm_models: bool = True) -> None:
+        """Start the warmup thread once; later calls do nothing."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.status = WARMING
+            self.started = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, args=(warm_models,), name="warmup", daemon=True)
+            self._thread.start()
+
+    def skip(self) -> None:
+        """Skip the model warmup; models then load on first use. The gallery is still built."""
+        if IDENTIFY_ENABLED:
+            self.start(warm_models=False)
+        else:
+            self.status = READY
+
+    def _run(self, warm_models: bool) -> None:
+        try:
+            failed = []
+            if warm_models:
+                face_pipeline.load()
+                report = model_registry.warmup()
+                failed = [name for name in model_registry.warm_names() if not report[name]["loaded"]]
+            if IDENTIFY_ENABLED:
+                gallery_index.load(EmbDataHandler().iter_embeds())
+            if failed:
+                self.error = f"Models not loaded: {', '.join(failed)}"
+                self.status = FAILED
+            else:
+                self.status = READY
+        except Exception as e:
+            self.error = str(e)
+            self.status = FAILED
+        self.elapsed_ms = round((time.perf_counter() - self.started) * 1000, 1)
+        log.info(f"Warmup {self.status} after {self.elapsed_ms} ms." + (f" {self.error}" if self.error else ""))
+
+    def report(self) -> dict:
+        return {
+            "status": self.status,
+            "elapsed_ms": self.elapsed_ms,
+            "error": self.error,
+            "models": {name: model_registry.is_loaded(name) for name in model_registry.warm_names()},
+        }
+
+
+warmup_state = WarmupState()
+
+
+async def healthz(request: Request) -> JSONResponse:
+    """Liveness: the process is up and serving requests."""
+    return JSONResponse({"status": "ok"})
+
+
+async def readyz(request: Request) -> JSONResponse:
+    """Readiness: 200 once the warmup has loaded every model, 503 before or if it failed."""
+    report = warmup_state.report()
+    return JSONResponse(report, status_code=200 if report["status"] == READY else 503)
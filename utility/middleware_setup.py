@@ -2,6 +2,8 @@
 
 import logging
 from starlette.middleware.sessions import SessionMiddleware
+from utility.request_metrics import MetricsMiddleware
+from auth_logic.usr_constants.serve_cfg import PROFILE_ENABLED
 
 # This function is for middleware setup. It should only be called once
 def initialize_middleware(app):
@@ -9,6 +11,14 @@ def initialize_middleware(app):
     try:
         logging.info("Initializing session middleware.")
         app.add_middleware(SessionMiddleware, secret_key="!secret")
+        if PROFILE_ENABLED:
+            # Imported only when enabled; otherwise no profiler code is on the request path
+            from utility.request_profiler import ProfilerMiddleware
+            logging.info("Initializing request profiler middleware.")
+            app.add_middleware(ProfilerMiddleware)
+        # Added last so it wraps everything and times the whole request
+        logging.info("Initializing metrics middleware.")
+        app.add_middleware(MetricsMiddleware)
         logging.info("Middleware setup complete.")
     except Exception as e:
         logging.error(f"Error setting up middleware: {e}")
@@ -0,0 +1,110 @@
+# request_metrics.py
+
+import time
+import logging
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from auth_logic.usr_log.metrics import (
+    REQUEST_SECONDS,
+    REQUESTS_IN_FLIGHT,
+    finish_request,
+    metrics,
+    start_request,
+)
+from auth_logic.inference.model_registry import model_registry
+from auth_logic.connect_data.record_cache import embed_cache, user_cache
+from auth_logic.validation import face_pipeline
+
+log = logging.getLogger("RequestMetrics")
+
+
+class MetricsMiddleware:
+    """ASGI middleware that times each HTTP request and logs its stage breakdown."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        token = start_request()
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_FLIGHT.dec()
+            stages = finish_request(token)
+            route = scope.get("route")
+            # Route templates keep label cardinality bounded; unmatched paths are grouped
+            path = getattr(route, "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(elapsed, route=path, method=scope["method"], status=status["code"])
+            if path != "/metrics":
+                breakdown = " ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in stages.items())
+                log.info(f"{scope['method']} {scope['path']} {status['code']} {elapsed * 1000:.1f}ms {breakdown}".rstrip())
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Prometheus text exposition of every metric in this process."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def _model_stats(field: str, scale: float = 1.0):
+    def collect():
+        return {
+            (("model", name),): stats[field] * scale
+            for name, stats in model_registry.report().items()
+            if stats["loaded"]
+        }
+    return collect
+
+
+def _cache_stats(field: str):
+    def collect():
+        caches = [user_cache.stats(), embed_cache.stats()]
+        # A scrape never imports the face pipeline; its figures appear once it is loaded
+        if face_pipeline.is_loaded():
+            from auth_logic.inference.embed_memo import embed_memo
+            caches.append(embed_memo.stats())
+        return {(("cache", stats["name"]),): stats[field] for stats in caches}
+    return collect
+
+
+def _cascade_stats():
+    if not face_pipeline.is_loaded():
+        return {}
+    from auth_logic.validation.model_cascade import ESCALATED, FAST_ACCEPT, FAST_REJECT, NO_TEMPLATE, cascade_stats
+    stats = cascade_stats.stats()
+    return {(("outcome", outcome),): stats[outcome] for outcome in (FAST_ACCEPT, FAST_REJECT, ESCALATED, NO_TEMPLATE)}
+
+
+def _scheduler_stats(field: str):
+    def collect():
+        if not face_pipeline.is_loaded():
+            return {}
+        from auth_logic.inference.batch_scheduler import scheduler_stats
+        stats = scheduler_stats()
+        return {} if stats is None else {(): stats[field]}
+    return collect
+
+
+metrics.gauge("model_load_seconds", "Time taken to load each model.", _model_stats("load_ms", 0.001))
+metrics.gauge("model_rss_delta_bytes", "Resident memory added by loading each model.", _model_stats("rss_delta_mb", 1024 * 1024))
+metrics.counter("cache_hits_total", "Lookups answered from each cache.", _cache_stats("hits"))
+metrics.counter("cache_misses_total", "Lookups that missed each cache.", _cache_stats("misses"))
+metrics.gauge("cache_entries", "Entries currently held by each cache.", _cache_stats("entries"))
+metrics.counter("model_cascade_requests_total", "Model-cascade requests by first-tier outcome.", _cascade_stats)
+metrics.gauge("inference_queue_depth", "Faces waiting in the batch scheduler queue.", _scheduler_stats("queue_depth"))
+metrics.gauge("inference_batch_fill_ratio", "Average batch size over the maximum since start.", _scheduler_stats("avg_batch_fill"))
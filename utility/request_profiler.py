@@ -0,0 +1,55 @@
+# request_profiler.py
+
+import hmac
+import random
+import logging
+
+from auth_logic.usr_constants.serve_cfg import PROFILE_HEADER, PROFILE_SAMPLE_RATE, PROFILE_TOKEN
+from auth_logic.usr_log.profiler import ProfileSession
+from utility.worker_pool import run_blocking
+
+log = logging.getLogger("RequestProfiler")
+
+
+class ProfilerMiddleware:
+    """Profiles requests that carry the admin profile token, plus a random sample.
+
+    Only installed when PROFILE_ENABLED is set, so unprofiled deployments pay
+    nothing. The token is compared in constant time and never logged.
+    """
+
+    def __init__(self, app, token: str = PROFILE_TOKEN, header: str = PROFILE_HEADER, sample_rate: float = PROFILE_SAMPLE_RATE) -> None:
+        self.app = app
+        self.token = token.encode()
+        self.header = header.lower().encode()
+        self.sample_rate = sample_rate
+
+    def wanted(self, scope) -> bool:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == self.header:
+                    return hmac.compare_digest(value, self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        session = ProfileSession(f"{scope['method']} {scope['path']}")
+        token = session.activate()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            session.deactivate(token)
+            try:
+                await run_blocking(session.finish, status["code"])
+            except Exception as e:
+                log.warning(f"Could not write profile: {e}")
@@ -3,16 +3,25 @@
 import logging
 from phases.app_phase import user_application
 from phases.auth_phase import user_authentikator
+from utility.request_metrics import metrics_endpoint
+from utility.app_health import healthz, readyz
 
 # Here we set up all routes. Not much else to do here.
 def configure_routes(app):
     """Add routes to the FastAPI application."""
     try:
         logging.info("Adding authentication routes.")
-        app.include_router(user_authentikator.rtr)
+        app.include_router(user_authentikator.auth_router)
         
         logging.info("Adding application routes.")
-        app.include_router(user_application.app_router)
+        app.include_router(user_application.app_handler)
+
+        logging.info("Adding metrics route.")
+        app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
+
+        logging.info("Adding health routes.")
+        app.add_api_route("/healthz", healthz, methods=["GET"], include_in_schema=False)
+        app.add_api_route("/readyz", readyz, methods=["GET"], include_in_schema=False)
         
         logging.info("Routes setup complete.")
     except Exception as e:
@@ -0,0 +1,123 @@
+# worker_pool.py
+
+import asyncio
+import functools
+import contextvars
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from auth_logic.usr_constants.serve_cfg import (
+    IO_EXECUTOR_WORKERS,
+    MAX_CONCURRENT_VERIFICATIONS,
+    PROFILE_ENABLED,
+    VERIFY_EXECUTOR_KIND,
+    VERIFY_EXECUTOR_WORKERS,
+)
+from auth_logic.usr_log.metrics import EXECUTOR_IN_FLIGHT, stage
+
+if PROFILE_ENABLED:
+    from auth_logic.usr_log.profiler import active_profile
+
+_io_executor = None
+_verify_executor = None
+_verify_limiter = None
+
+
+def _warm_process_worker():
+    """Load the models once in each worker process before it takes jobs."""
+    from auth_logic.inference.model_registry import model_registry
+    model_registry.warmup()
+
+
+def get_io_executor() -> Executor:
+    """Thread pool for bcrypt and database calls."""
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(max_workers=IO_EXECUTOR_WORKERS, thread_name_prefix="io")
+    return _io_executor
+
+
+def get_verify_executor() -> Executor:
+    """Thread or process pool for decoding, liveness and embedding work."""
+    global _verify_executor
+    if _verify_executor is None:
+        if VERIFY_EXECUTOR_KIND == "process":
+            logging.info(f"Starting verification process pool with {VERIFY_EXECUTOR_WORKERS} workers.")
+            _verify_executor = ProcessPoolExecutor(
+                max_workers=VERIFY_EXECUTOR_WORKERS, initializer=_warm_process_worker
+            )
+        else:
+            logging.info(f"Starting verification thread pool with {VERIFY_EXECUTOR_WORKERS} workers.")
+            _verify_executor = ThreadPoolExecutor(
+                max_workers=VERIFY_EXECUTOR_WORKERS, thread_name_prefix="verify"
+            )
+    return _verify_executor
+
+
+def _in_context(func, *args, **kwargs):
+    """Bind a call to a copy of the caller's context so stage timings reach the request.
+
+    Jobs of a request being profiled also run under that request's profiler.
+    """
+    if PROFILE_ENABLED:
+        session = active_profile()
+        if session is not None:
+            func = functools.partial(session.run, func)
+    return functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+async def _submit(executor: Executor, pool: str, call):
+    loop = asyncio.get_running_loop()
+    EXECUTOR_IN_FLIGHT.inc(pool=pool)
+    try:
+        return await loop.run_in_executor(executor, call)
+    finally:
+        EXECUTOR_IN_FLIGHT.dec(pool=pool)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking I/O or bcrypt call without stalling the event loop."""
+    return await _submit(get_io_executor(), "io", _in_context(func, *args, **kwargs))
+
+
+async def run_cpu_bound(func, *args, **kwargs):
+    """Run face verification work in the verification pool.
+
+    At most MAX_CONCURRENT_VERIFICATIONS jobs are in flight; further callers
+    wait here instead of piling work onto the pool. With the process pool,
+    ``func`` and its arguments must be picklable (module-level functions).
+    """
+    global _verify_limiter
+    if _verify_limiter is None:
+        _verify_limiter = asyncio.Semaphore(MAX_CONCURRENT_VERIFICATIONS)
+    if VERIFY_EXECUTOR_KIND == "process":
+        # Contexts cannot be pickled; the whole job is timed here instead of per stage
+        call = functools.partial(func, *args, **kwargs)
+    else:
+        call = _in_context(func, *args, **kwargs)
+    async with _verify_limiter:
+        with stage("verify_job"):
+            return await _submit(get_verify_executor(), "verify", call)
+
+
+async def run_cpu_bound_local(func, *args, **kwargs):
+    """Like run_cpu_bound, for stateful callables that must stay in this process.
+
+    Uses the verification pool when it is a thread pool, and the I/O thread
+    pool otherwise, under the same concurrency limit.
+    """
+    global _verify_limiter
+    if _verify_limiter is None:
+        _verify_limiter = asyncio.Semaphore(MAX_CONCURRENT_VERIFICATIONS)
+    executor = get_io_executor() if VERIFY_EXECUTOR_KIND == "process" else get_verify_executor()
+    async with _verify_limiter:
+        return await _submit(executor, "verify", _in_context(func, *args, **kwargs))
+
+
+def shutdown_worker_pool() -> None:
+    """Stop both pools; called on application shutdown."""
+    global _io_executor, _verify_executor, _verify_limiter
+    for executor in (_io_executor, _verify_executor):
+        if executor is not None:
+            executor.shutdown(wait=False)
+    _io_executor = _verify_executor = _verify_limiter = None